@@ -0,0 +1,231 @@
+"""
+Benchmark the checker's hot paths on synthetic corpora and ban configurations.
+
+Run with:
+
+    python benchmarks/checker.py [--quick] [--output results.json]
+                                 [--compare baseline.json]
+
+Results are the best time of several repeats, in seconds. Save the results of
+one revision with --output, then pass that file to --compare on another
+revision to print the relative change for each benchmark.
+"""
+
+from __future__ import annotations
+
+import argparse
+import ast
+import json
+import platform
+import random
+import timeit
+from collections.abc import Callable
+from functools import partial
+from pathlib import Path
+from typing import Any
+
+from flake8_tidy_imports import ImportChecker
+from flake8_tidy_imports._scan import scan_imports
+
+BAN_COUNTS = (0, 100, 1000, 10_000)
+
+
+def make_module_names(rng: random.Random, count: int) -> list[str]:
+    words = ["api", "core", "utils", "models", "internal", "views", "pb2", "io"]
+    return [
+        ".".join(
+            [f"pkg{rng.randrange(200)}"]
+            + [rng.choice(words) for _ in range(rng.randrange(4))]
+        )
+        for _ in range(count)
+    ]
+
+
+def make_ban_config(count: int, seed: int = 0) -> str:
+    """
+    Return a banned-modules setting with count bans, mixing exact bans,
+    structured "foo.*" bans, and unstructured "*" glob bans.
+    """
+    rng = random.Random(seed)
+    lines = []
+    for i, module in enumerate(make_module_names(rng, count)):
+        kind = i % 10
+        if kind < 6:
+            lines.append(f"{module} = exact ban {i}")
+        elif kind < 9:
+            lines.append(f"{module}.* = structured ban {i}")
+        else:
+            parts = module.split(".")
+            parts.insert(rng.randrange(1, len(parts) + 1), "*")
+            lines.append(f"{'.'.join(parts)}.internal = glob ban {i}")
+    return "\n".join(lines)
+
+
+def make_imports(rng: random.Random, count: int) -> str:
+    lines = []
+    for module in make_module_names(rng, count):
+        kind = rng.randrange(4)
+        if kind == 0:
+            lines.append(f"import {module}")
+        elif kind == 1:
+            lines.append(f"import {module} as {module.rpartition('.')[2]}")
+        elif kind == 2:
+            lines.append(f"from {module} import name, other as other")
+        else:
+            lines.append(f"from .{module} import name")
+    return "\n".join(lines) + "\n"
+
+
+def make_corpora() -> dict[str, str]:
+    rng = random.Random(0)
+    function = (
+        "def function_{i}(argument):\n"
+        + "    result = [argument * {i} + x for x in range(argument) if x % 3]\n"
+        + "    if result:\n"
+        + "        return {{'key': result, 'other': (argument, {i})}}\n"
+        + "    return None\n"
+    )
+    generated_names = ",\n".join(f"    Message{i}" for i in range(400))
+    return {
+        "small": make_imports(rng, 10)
+        + "".join(function.format(i=i) for i in range(20)),
+        "huge": make_imports(rng, 50)
+        + "".join(function.format(i=i) for i in range(4000)),
+        "import_heavy": make_imports(rng, 2000),
+        "generated": "".join(
+            f"from pkg{i}.api_pb2 import (\n{generated_names},\n)\n" for i in range(10)
+        )
+        + "".join(f"MESSAGE_{i} = Message{i % 400}\n" for i in range(10_000)),
+    }
+
+
+def parse_options(banned_modules: str) -> None:
+    options = argparse.Namespace(
+        banned_modules=banned_modules,
+        ban_relative_imports="true",
+        banned_module_level_imports="",
+        tidy_imports_stats=False,
+    )
+    ImportChecker.parse_options(options)
+
+
+def scan_or_parse(source: str) -> ast.Module:
+    return scan_imports(source) or ast.parse(source)
+
+
+def best_time(func: Callable[[], Any], repeat: int) -> float:
+    number = 1
+    # Increase the loop count until a repeat takes long enough to measure.
+    while (elapsed := timeit.timeit(func, number=number)) < 0.02:
+        number *= 10
+    times = [elapsed, *timeit.repeat(func, number=number, repeat=repeat - 1)]
+    return min(times) / number
+
+
+def run_benchmarks(repeat: int) -> dict[str, float]:
+    results: dict[str, float] = {}
+    module_names = make_module_names(random.Random(1), 1000)
+    sources = make_corpora()
+    corpora = {name: ast.parse(source) for name, source in sources.items()}
+
+    # Finding imports, with a full parse or as the standalone command's
+    # --fast-scan does.
+    for corpus, source in sources.items():
+        results[f"ast_parse[corpus={corpus}]"] = best_time(
+            partial(ast.parse, source), repeat
+        )
+        results[f"scan_imports[corpus={corpus}]"] = best_time(
+            partial(scan_or_parse, source), repeat
+        )
+
+    for count in BAN_COUNTS:
+        config = make_ban_config(count)
+        results[f"parse_options[bans={count}]"] = best_time(
+            partial(parse_options, config), repeat
+        )
+
+        parse_options(config)
+
+        def lookup_bans() -> None:
+            # Bypass the cache, to time the ban index itself.
+            for module_name in module_names:
+                ImportChecker.config.banned_modules.find(module_name)
+
+        results[f"module_ban_lookup[bans={count},names=1000]"] = best_time(
+            lookup_bans, repeat
+        )
+
+        for corpus, tree in corpora.items():
+            checker = ImportChecker(tree)
+            nodes: list[ast.AST] = list(checker._iter_imports())
+            for rule in (
+                ImportChecker.rule_I250,
+                ImportChecker.rule_I251,
+                ImportChecker.rule_I252,
+            ):
+                if rule is not ImportChecker.rule_I251 and count != 0:
+                    # Only I251 depends on the bans.
+                    continue
+
+                def run_rule(
+                    rule: Callable[[ImportChecker, ast.AST], Any] = rule,
+                    checker: ImportChecker = checker,
+                    nodes: list[ast.AST] = nodes,
+                ) -> None:
+                    for node in nodes:
+                        for _ in rule(checker, node):
+                            pass
+
+                results[f"{rule.__name__}[bans={count},corpus={corpus}]"] = best_time(
+                    run_rule, repeat
+                )
+
+            def run(checker: ImportChecker = checker) -> None:
+                for _ in checker.run():
+                    pass
+
+            results[f"run[bans={count},corpus={corpus}]"] = best_time(run, repeat)
+
+    return results
+
+
+def compare(results: dict[str, float], baseline: dict[str, float]) -> None:
+    width = max(len(name) for name in results)
+    for name, seconds in results.items():
+        line = f"{name:<{width}}  {seconds * 1e6:12.1f} us"
+        if name in baseline:
+            line += f"  {seconds / baseline[name]:6.2f}x baseline"
+        print(line)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--quick", action="store_true", help="Use fewer repeats.")
+    parser.add_argument("--output", type=Path, help="Save results as JSON.")
+    parser.add_argument("--compare", type=Path, help="JSON results to compare against.")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(repeat=3 if args.quick else 7)
+
+    baseline: dict[str, float] = {}
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())["results"]
+    compare(results, baseline)
+
+    if args.output:
+        args.output.write_text(
+            json.dumps(
+                {
+                    "python": platform.python_version(),
+                    "implementation": platform.python_implementation(),
+                    "results": results,
+                },
+                indent=2,
+            )
+            + "\n"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,70 @@
+"""
+Measure the import time of flake8-tidy-imports, and of the {python2to3} ban
+table that is only loaded when a configuration uses it.
+
+Run with:
+
+    python benchmarks/import_time.py [--runs N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+
+def import_time_us(module: str, preload: list[str]) -> int:
+    """
+    Return the cumulative import time of module, in microseconds, as reported
+    by -X importtime in a fresh interpreter, after importing the preload
+    modules so their cost is excluded.
+    """
+    code = "".join(f"import {name}\n" for name in [*preload, module])
+    # Allow bytecode caching, so compilation is not measured.
+    env = {k: v for k, v in os.environ.items() if k != "PYTHONDONTWRITEBYTECODE"}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+        env=env,
+    )
+    for line in result.stderr.splitlines():
+        # Lines look like "import time:  self [us] | cumulative | package"
+        _, _, rest = line.partition(":")
+        parts = [part.strip() for part in rest.split("|")]
+        if len(parts) == 3 and parts[2] == module:
+            return int(parts[1])
+    raise ValueError(f"No import time reported for {module}")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    # Warm up the bytecode cache.
+    import_time_us("flake8_tidy_imports._python2to3", ["flake8_tidy_imports"])
+
+    plugin = [
+        import_time_us("flake8_tidy_imports", ["flake8.options.manager"])
+        for _ in range(args.runs)
+    ]
+    table = [
+        import_time_us("flake8_tidy_imports._python2to3", ["flake8_tidy_imports"])
+        for _ in range(args.runs)
+    ]
+    plugin_ms = statistics.median(plugin) / 1000
+    table_ms = statistics.median(table) / 1000
+    print(f"Median of {args.runs} runs:")
+    print(f"  flake8_tidy_imports import:        {plugin_ms:.3f} ms")
+    print(f"  {{python2to3}} table, on demand:     {table_ms:.3f} ms")
+    print(f"  Both, as when the table is needed: {plugin_ms + table_ms:.3f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
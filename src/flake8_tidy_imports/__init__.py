@@ -1,14 +1,497 @@
 from __future__ import annotations
 
 import ast
-import re
-from collections.abc import Generator
+import sys
+import time
+from collections.abc import Callable, Generator, Iterable, Iterator, Mapping
+from functools import cache, cached_property, lru_cache, partial
 from importlib.metadata import version
-from re import Pattern
-from typing import Any, Literal
+from typing import TYPE_CHECKING, Any, Literal, NamedTuple
 
 from flake8.options.manager import OptionManager
 
+if TYPE_CHECKING:
+    from functools import _lru_cache_wrapper
+
+    from ._stats import Stats
+
+Rule = Callable[["ImportChecker", ast.AST], Generator[tuple[int, int, str, type[Any]]]]
+
+
+class Ban(NamedTuple):
+    """
+    A ban from the banned-modules option.
+    """
+
+    kind: Literal["exact", "structured", "unstructured"]
+    # The module pattern, e.g. "foo.*".
+    pattern: str
+    message: str
+    # The line of the option that the ban comes from.
+    line: str
+
+
+class BanIndex:
+    """
+    Trie of dotted module path segments holding the exact and structured
+    ("foo.*") bans, so lookups cost depends on the depth of the module name
+    rather than the number of bans.
+    """
+
+    __slots__ = ("children", "exact", "structured")
+
+    def __init__(self) -> None:
+        self.children: dict[str, BanIndex] = {}
+        # Exact ban of this path.
+        self.exact: Ban | None = None
+        # Structured ban of everything below this path.
+        self.structured: Ban | None = None
+
+    def _node(self, module: str) -> BanIndex:
+        node = self
+        for part in module.split("."):
+            child = node.children.get(part)
+            if child is None:
+                child = node.children[part] = BanIndex()
+            node = child
+        return node
+
+    def add_exact(self, ban: Ban) -> None:
+        self._node(ban.pattern).exact = ban
+
+    def add_structured(self, ban: Ban) -> None:
+        node = self._node(ban.pattern[:-2])
+        # The first of duplicate patterns wins.
+        if node.structured is None:
+            node.structured = ban
+        # Also check for exact matches without the wildcard
+        # e.g. "foo.*" matches "foo"
+        if node.exact is None:
+            node.exact = ban
+
+    def lookup(self, module_name: str) -> tuple[Ban | None, Ban | None]:
+        """
+        Return the exact ban and the most specific structured ban matching the
+        module name, or None for each if there is no such ban.
+        """
+        node = self
+        structured = None
+        for part in module_name.split("."):
+            if node.structured is not None:
+                structured = node.structured
+            child = node.children.get(part)
+            if child is None:
+                return None, structured
+            node = child
+        return node.exact, structured
+
+    def lookup_children(
+        self, module_name: str
+    ) -> tuple[dict[str, BanIndex], Ban | None]:
+        """
+        Return the index nodes for the children of the module, and the most
+        specific structured ban matching all of them, or None if there is no
+        such ban.
+        """
+        node = self
+        structured = None
+        for part in module_name.split("."):
+            if node.structured is not None:
+                structured = node.structured
+            child = node.children.get(part)
+            if child is None:
+                return {}, structured
+            node = child
+        if node.structured is not None:
+            structured = node.structured
+        return node.children, structured
+
+
+# Glob tokens matching exactly one, or zero or more, module path segments.
+_ONE_SEGMENT = 0
+_ANY_SEGMENTS = 1
+
+
+class GlobMatcher:
+    """
+    Matcher for the unstructured glob bans, such as "foo.*.bar".
+
+    The patterns are split into segment tokens, where "*" matches zero or more
+    segments, or one or more at the start of a pattern. A module name is
+    matched against all the patterns at once by tracking the set of positions
+    reached in each pattern after each segment, so there is no backtracking.
+    """
+
+    def __init__(self) -> None:
+        self.patterns: list[tuple[tuple[str | int, ...], Ban]] = []
+        # Patterns indexed by their first literal segment, plus those
+        # starting with a wildcard, which can match any first segment.
+        self.by_first_segment: dict[str, list[int]] = {}
+        self.wildcard_first: list[int] = []
+
+    def add(self, ban: Ban) -> None:
+        parts = ban.pattern.split(".")
+        tokens: list[str | int] = [_ANY_SEGMENTS if p == "*" else p for p in parts]
+        index = len(self.patterns)
+        if parts[0] == "*":
+            tokens[0:1] = [_ONE_SEGMENT, _ANY_SEGMENTS]
+            self.wildcard_first.append(index)
+        else:
+            self.by_first_segment.setdefault(parts[0], []).append(index)
+        self.patterns.append((tuple(tokens), ban))
+
+    def _add_state(self, states: set[tuple[int, int]], index: int, pos: int) -> None:
+        # Add the position, and those reachable by "*" matching zero segments.
+        tokens = self.patterns[index][0]
+        states.add((index, pos))
+        while pos < len(tokens) and tokens[pos] == _ANY_SEGMENTS:
+            pos += 1
+            states.add((index, pos))
+
+    def _advance(self, states: set[tuple[int, int]], part: str) -> set[tuple[int, int]]:
+        next_states: set[tuple[int, int]] = set()
+        for index, pos in states:
+            tokens = self.patterns[index][0]
+            if pos == len(tokens):
+                continue
+            token = tokens[pos]
+            if token == _ANY_SEGMENTS:
+                self._add_state(next_states, index, pos)
+            elif token in (_ONE_SEGMENT, part):
+                self._add_state(next_states, index, pos + 1)
+        return next_states
+
+    def _first_match(self, states: set[tuple[int, int]]) -> Ban | None:
+        matched = [
+            index for index, pos in states if pos == len(self.patterns[index][0])
+        ]
+        if not matched:
+            return None
+        return self.patterns[min(matched)][1]
+
+    def states(self, module_name: str) -> set[tuple[int, int]]:
+        """
+        Return the positions reached in the patterns after matching the
+        module name. If empty, no pattern can match the module or any module
+        below it.
+        """
+        states: set[tuple[int, int]] = set()
+        if not self.patterns:
+            return states
+
+        first, *rest = module_name.split(".")
+        for index in self.by_first_segment.get(first, ()):
+            self._add_state(states, index, 1)
+        for index in self.wildcard_first:
+            self._add_state(states, index, 1)
+
+        for part in rest:
+            if not states:
+                break
+            states = self._advance(states, part)
+        return states
+
+    def match(self, module_name: str) -> Ban | None:
+        """
+        Return the ban of the first pattern matching the module name, or None
+        if none match.
+        """
+        return self._first_match(self.states(module_name))
+
+    def match_child(self, states: set[tuple[int, int]], name: str) -> Ban | None:
+        """
+        Return the ban of the first pattern matching the child called name of
+        the module that the states were reached for, or None if none match.
+        """
+        return self._first_match(self._advance(states, name))
+
+
+class BanList:
+    """
+    The bans from a banned-modules style option, compiled for lookups.
+    """
+
+    __slots__ = ("index", "lines", "lookup", "unstructured_patterns")
+
+    # Size of the lookup() cache, which is kept across all files.
+    lookup_cache_size = 8192
+
+    def __init__(self, option: str | Mapping[str, str] = "") -> None:
+        if isinstance(option, str):
+            lines = [line.strip() for line in option.split("\n") if line.strip()]
+        else:
+            lines = [f"{module} = {message}" for module, message in option.items()]
+        # The naming follows the approach described by mypy:
+        # https://mypy.readthedocs.io/en/stable/config_file.html#config-file-format
+        self.index = BanIndex()
+        self.unstructured_patterns = GlobMatcher()
+        for line in lines:
+            if line == "{python2to3}":
+                # Imported on demand, as few configurations use the table.
+                from ._python2to3 import (
+                    python2to3_banned_modules,
+                )
+
+                for module, message in python2to3_banned_modules.items():
+                    self.index.add_exact(Ban("exact", module, message, line))
+                continue
+            if "=" not in line:
+                raise ValueError("'=' not found")
+            module, message = line.split("=", 1)
+            module = module.strip()
+            message = message.strip()
+
+            if "*" in module[:-1] or module == "*":
+                # unstructured
+                self.unstructured_patterns.add(
+                    Ban("unstructured", module, message, line)
+                )
+            elif module.endswith(".*"):
+                # structured
+                self.index.add_structured(Ban("structured", module, message, line))
+            else:
+                self.index.add_exact(Ban("exact", module, message, line))
+        self.lines = tuple(lines)
+        self.lookup: _lru_cache_wrapper[Ban | None] = lru_cache(
+            maxsize=self.lookup_cache_size
+        )(self.find)
+
+    def __bool__(self) -> bool:
+        return bool(self.index.children or self.unstructured_patterns.patterns)
+
+    def __getstate__(self) -> tuple[BanIndex, GlobMatcher, tuple[str, ...]]:
+        # Pickle the compiled bans, so that process pool workers can receive
+        # them without parsing the option again. The cache is not kept.
+        return (self.index, self.unstructured_patterns, self.lines)
+
+    def __setstate__(
+        self, state: tuple[BanIndex, GlobMatcher, tuple[str, ...]]
+    ) -> None:
+        self.index, self.unstructured_patterns, self.lines = state
+        self.lookup = lru_cache(maxsize=self.lookup_cache_size)(self.find)
+
+    def find(self, module_name: str) -> Ban | None:
+        """
+        Return the ban for the module, or None if it is not banned. lookup()
+        caches the results.
+        """
+        exact_ban, structured_ban = self.index.lookup(module_name)
+        if exact_ban is not None:
+            return exact_ban
+
+        # Check unustructed wildcards
+        unstructured_ban = self.unstructured_patterns.match(module_name)
+        if unstructured_ban is not None:
+            return unstructured_ban
+
+        # Check structured wildcards
+        return structured_ban
+
+    def children(
+        self, module_name: str, names: list[str]
+    ) -> Generator[tuple[str, Ban]]:
+        """
+        Yield the full names and bans of the banned children of the module,
+        from the given names.
+        """
+        # Equivalent to find() for each child of the module, but walking the
+        # module name once, and not at all per child when no ban can match
+        # below the module.
+        children, structured_ban = self.index.lookup_children(module_name)
+        unstructured = self.unstructured_patterns
+        states = unstructured.states(module_name)
+        if not children and not states and structured_ban is None:
+            return
+
+        for name in names:
+            child = children.get(name)
+            if child is not None and child.exact is not None:
+                yield f"{module_name}.{name}", child.exact
+                continue
+            if states:
+                unstructured_ban = unstructured.match_child(states, name)
+                if unstructured_ban is not None:
+                    yield f"{module_name}.{name}", unstructured_ban
+                    continue
+            if structured_ban is not None:
+                yield f"{module_name}.{name}", structured_ban
+
+
+class Error(NamedTuple):
+    """
+    An error found by Config's check methods.
+    """
+
+    line: int
+    # The column offset, starting at 0, as in the ast module.
+    col: int
+    # The message, starting with the error code, e.g. "I251 Banned import...".
+    message: str
+
+
+class Config:
+    """
+    Compiled flake8-tidy-imports options, to check imports without flake8:
+
+        config = Config(banned_modules={"mock": "Use unittest.mock."})
+        for error in config.check_source(source):
+            ...
+
+    banned_modules and banned_module_level_imports take their option's text,
+    or a mapping of module patterns to messages, and ban_relative_imports
+    takes the same values as its option, or a bool. Configs are immutable, so
+    several can be used side by side, and from many threads.
+    """
+
+    __slots__ = (
+        "ban_relative_imports",
+        "banned_module_level_imports",
+        "banned_modules",
+        "rules",
+    )
+
+    banned_modules: BanList
+    banned_module_level_imports: BanList
+    ban_relative_imports: Literal["", "parents", "true"]
+    # The rule functions enabled by the options, run for each import.
+    rules: tuple[Rule, ...]
+
+    def __init__(
+        self,
+        banned_modules: str | Mapping[str, str] = "",
+        ban_relative_imports: Literal["", "parents", "true"] | bool = "",
+        banned_module_level_imports: str | Mapping[str, str] = "",
+    ) -> None:
+        if ban_relative_imports is True:
+            ban_relative_imports = "true"
+        elif ban_relative_imports is False:
+            ban_relative_imports = ""
+        elif ban_relative_imports not in ("", "parents", "true"):
+            raise ValueError(
+                f"Invalid ban_relative_imports value {ban_relative_imports!r}"
+            )
+
+        self._init(
+            BanList(banned_modules),
+            ban_relative_imports,
+            BanList(banned_module_level_imports),
+        )
+
+    def _init(
+        self,
+        banned_modules: BanList,
+        ban_relative_imports: Literal["", "parents", "true"],
+        banned_module_level_imports: BanList,
+    ) -> None:
+        # Skip the rules that cannot report anything for these options.
+        rules: list[Rule] = [ImportChecker.rule_I250]
+        if banned_modules:
+            rules.append(ImportChecker.rule_I251)
+        if ban_relative_imports:
+            rules.append(ImportChecker.rule_I252)
+        if banned_module_level_imports:
+            rules.append(ImportChecker.rule_I253)
+
+        init = super().__setattr__
+        init("banned_modules", banned_modules)
+        init("ban_relative_imports", ban_relative_imports)
+        init("banned_module_level_imports", banned_module_level_imports)
+        init("rules", tuple(rules))
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"{type(self).__name__} objects are immutable")
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        # Pickle the compiled ban lists rather than the options, so that
+        # process pool workers can receive a config without parsing the options
+        # again.
+        return (
+            self._from_compiled,
+            (
+                self.banned_modules,
+                self.ban_relative_imports,
+                self.banned_module_level_imports,
+            ),
+        )
+
+    @classmethod
+    def _from_compiled(
+        cls,
+        banned_modules: BanList,
+        ban_relative_imports: Literal["", "parents", "true"],
+        banned_module_level_imports: BanList,
+    ) -> Config:
+        config = cls.__new__(cls)
+        config._init(banned_modules, ban_relative_imports, banned_module_level_imports)
+        return config
+
+    def check_source(self, source: str, fast_scan: bool = False) -> list[Error]:
+        """
+        Return the errors in the given source code, sorted by position. Raise
+        SyntaxError if it cannot be parsed.
+
+        With fast_scan, imports are found without parsing the whole source
+        where possible, which is faster but does not detect all syntax errors.
+        """
+        tree = None
+        # The scan loses the statements enclosing imports, which I253 needs.
+        if fast_scan and not self.banned_module_level_imports:
+            from ._scan import scan_imports
+
+            tree = scan_imports(source)
+        if tree is None:
+            tree = ast.parse(source)
+        return self.check_tree(tree)
+
+    def check_tree(self, tree: ast.AST) -> list[Error]:
+        """
+        Return the errors in the given parsed module, sorted by position.
+        """
+        checker = ImportChecker(tree)
+        checker.config = self
+        # Stats are only collected for flake8 runs.
+        checker.stats = None
+        return sorted(
+            Error(line, col, message) for line, col, message, _ in checker.run()
+        )
+
+    def check_many(
+        self, sources: Iterable[str], fast_scan: bool = False, threads: int = 1
+    ) -> Iterator[list[Error]]:
+        """
+        Check each of the given source codes, yielding their errors in turn.
+
+        With threads above 1, sources are checked in a pool of that many
+        threads. This only speeds up checking on free-threaded builds of
+        Python.
+        """
+        if threads <= 1:
+            for source in sources:
+                yield self.check_source(source, fast_scan=fast_scan)
+            return
+
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(threads) as executor:
+            yield from executor.map(
+                partial(self.check_source, fast_scan=fast_scan), sources
+            )
+
+
+class LazyVersion:
+    """
+    Descriptor looking up the package version on first access, since reading
+    the installed distributions' metadata is slow.
+    """
+
+    @staticmethod
+    @cache
+    def _version() -> str:
+        return version("flake8-tidy-imports")
+
+    def __get__(self, instance: object, owner: type[Any] | None = None) -> str:
+        return self._version()
+
 
 class ImportChecker:
     """
@@ -16,14 +499,13 @@ class ImportChecker:
     """
 
     name = "flake8-tidy-imports"
-    version = version("flake8-tidy-imports")
+    version = LazyVersion()
 
-    # The naming follows the approach described by mypy:
-    # https://mypy.readthedocs.io/en/stable/config_file.html#config-file-format
-    banned_modules: dict[str, str]
-    banned_structured_patterns: list[tuple[str, str]]
-    banned_unstructured_patterns: list[tuple[Pattern[str], str]]
-    ban_relative_imports: Literal["", "parents", "true"]
+    # The options, set by parse_options(). Config.check_tree() sets an
+    # instance's own config instead.
+    config: Config
+    # Counters for --tidy-imports-stats, None when it is not set.
+    stats: Stats | None = None
 
     def __init__(self, tree: ast.AST) -> None:
         self.tree = tree
@@ -52,53 +534,139 @@ class ImportChecker:
             help="Ban relative imports, from parental modules or in all cases.",
         )
 
-    @classmethod
-    def parse_options(cls, options: Any) -> None:
-        lines = [
-            line.strip() for line in options.banned_modules.split("\n") if line.strip()
-        ]
-        cls.banned_modules = {}
-        cls.banned_structured_patterns = []
-        cls.banned_unstructured_patterns = []
-        for line in lines:
-            if line == "{python2to3}":
-                cls.banned_modules.update(cls.python2to3_banned_modules)
-                continue
-            if "=" not in line:
-                raise ValueError("'=' not found")
-            module, message = line.split("=", 1)
-            module = module.strip()
-            message = message.strip()
+        parser.add_option(
+            "--banned-module-level-imports",
+            action="store",
+            parse_from_config=True,
+            default="",
+            help=(
+                "A map of modules to ban importing at module level, but not "
+                + "within functions, to the error messages to display in the "
+                + "error."
+            ),
+        )
 
-            if "*" in module[:-1] or module == "*":
-                # unstructured
-                cls.banned_unstructured_patterns.append(
-                    (cls.compile_unstructured_glob(module), message)
-                )
-            elif module.endswith(".*"):
-                # structured
-                cls.banned_structured_patterns.append((module, message))
-                # Also check for exact matches without the wildcard
-                # e.g. "foo.*" matches "foo"
-                prefix = module[:-2]
-                if prefix not in cls.banned_modules:
-                    cls.banned_modules[prefix] = message
-            else:
-                cls.banned_modules[module] = message
+        parser.add_option(
+            "--tidy-imports-stats",
+            action="store_true",
+            parse_from_config=True,
+            default=False,
+            help=(
+                "Print counts and timings of flake8-tidy-imports' work at the "
+                + "end of the run."
+            ),
+        )
 
-        # Sort the structured patterns so we match the specific ones first.
-        cls.banned_structured_patterns.sort(key=lambda x: len(x[0]), reverse=True)
+    @classmethod
+    def parse_options(cls, options: Any) -> None:
+        cls.config = Config(
+            options.banned_modules,
+            options.ban_relative_imports,
+            options.banned_module_level_imports,
+        )
+        if options.tidy_imports_stats:
+            # Only imported when enabled, to keep the plugin's import fast.
+            from ._stats import Stats
 
-        cls.ban_relative_imports = options.ban_relative_imports
+            cls.stats = Stats.start()
+            cls.stats.ban_lines = [
+                *cls.config.banned_modules.lines,
+                *cls.config.banned_module_level_imports.lines,
+            ]
+        else:
+            cls.stats = None
 
     message_I250 = "I250 Unnecessary import alias - rewrite as '{}'."
     message_I251 = "I251 Banned import '{name}' used - {msg}."
+    message_I253 = "I253 Banned module level import '{name}' used - {msg}."
 
     def run(self) -> Generator[tuple[int, int, str, type[Any]]]:
-        rule_funcs = (self.rule_I250, self.rule_I251, self.rule_I252)
-        for node in ast.walk(self.tree):
-            for rule_func in rule_funcs:
-                yield from rule_func(node)
+        if self.stats is not None:
+            yield from self._run_with_stats(self.stats)
+            return
+
+        rules = self.config.rules
+        for node in self._iter_imports():
+            for rule in rules:
+                yield from rule(self, node)
+
+    def _run_with_stats(
+        self, stats: Stats
+    ) -> Generator[tuple[int, int, str, type[Any]]]:
+        start = time.perf_counter_ns()
+        nodes = list(self._iter_imports())
+        stats.counts["traversal ns"] += time.perf_counter_ns() - start
+        stats.counts["files checked"] += 1
+        stats.counts["nodes visited"] += self.nodes_visited
+        stats.counts["imports checked"] += len(nodes)
+
+        counts = stats.counts
+        rules = [(rule, f"{rule.__name__} ns") for rule in self.config.rules]
+        for node in nodes:
+            for rule, name in rules:
+                start = time.perf_counter_ns()
+                results = list(rule(self, node))
+                counts[name] += time.perf_counter_ns() - start
+                yield from results
+
+        cache_infos = [
+            self.config.banned_modules.lookup.cache_info(),
+            self.config.banned_module_level_imports.lookup.cache_info(),
+        ]
+        stats.record_cache(
+            sum(info.hits for info in cache_infos),
+            sum(info.misses for info in cache_infos),
+        )
+        stats.flush()
+
+    # Fields that can hold lists of statements, or of except handlers and
+    # match cases that in turn hold statements.
+    _statement_list_fields = ("body", "orelse", "finalbody", "handlers", "cases")
+
+    # Imports, and the nodes with statement lists that may contain them. Exact
+    # types are used since set membership is faster than isinstance().
+    _import_container_types: set[type[ast.AST]] = {
+        ast.Import,
+        ast.ImportFrom,
+        ast.FunctionDef,
+        ast.AsyncFunctionDef,
+        ast.ClassDef,
+        ast.For,
+        ast.AsyncFor,
+        ast.While,
+        ast.If,
+        ast.With,
+        ast.AsyncWith,
+        ast.Match,
+        ast.match_case,
+        ast.Try,
+        ast.ExceptHandler,
+    }
+    if sys.version_info >= (3, 11):
+        _import_container_types.add(ast.TryStar)
+
+    def _iter_imports(self) -> Generator[ast.Import | ast.ImportFrom]:
+        # Imports are statements, so only descend through statement lists,
+        # skipping the expressions that make up most of the tree, and the
+        # simple statements that cannot contain imports.
+        container_types = self._import_container_types
+        stack = [self.tree]
+        visited = 0
+        while stack:
+            node = stack.pop()
+            visited += 1
+            if isinstance(node, (ast.Import, ast.ImportFrom)):
+                yield node
+                continue
+            for field in self._statement_list_fields:
+                value = getattr(node, field, None)
+                if isinstance(value, list):
+                    stack.extend(
+                        child
+                        for child in reversed(value)
+                        if type(child) in container_types
+                    )
+        self.nodes_visited = visited
 
     def rule_I250(self, node: ast.AST) -> Generator[tuple[int, int, str, type[Any]]]:
         if isinstance(node, ast.Import):
@@ -133,68 +701,67 @@ class ImportChecker:
                         type(self),
                     )
 
-    @staticmethod
-    def compile_unstructured_glob(s: str) -> Pattern[str]:
-        # Convert the patter to a regex such that ".*"
-        # matches zero or more modules.
-        parts = s.split(".")
-        transformed_parts = [
-            "(\\..*)?" if p == "*" else "\\." + re.escape(p) for p in parts
-        ]
-        if parts[0] == "*":
-            transformed_parts[0] = ".*"
-        else:
-            transformed_parts[0] = re.escape(parts[0])
-        return re.compile("".join(transformed_parts) + "\\Z")
-
     def _is_module_banned(self, module_name: str) -> tuple[bool, str]:
-        if module_name in self.banned_modules:
-            return True, self.banned_modules[module_name]
+        ban = self._module_ban(module_name)
+        if ban is None:
+            return False, ""
+        return True, ban.message
 
-        # Check unustructed wildcards
-        for banned_pattern, msg in self.banned_unstructured_patterns:
-            if banned_pattern.match(module_name):
-                return True, msg
+    def _module_ban(self, module_name: str) -> Ban | None:
+        return self.config.banned_modules.lookup(module_name)
 
-        # Check structured wildcards
-        for banned_prefix, msg in self.banned_structured_patterns:
-            if module_name.startswith(banned_prefix[:-1]):
-                return True, msg
-
-        return False, ""
-
-    def rule_I251(self, node: ast.AST) -> Generator[tuple[int, int, str, type[Any]]]:
+    def _banned_imports(
+        self, node: ast.Import | ast.ImportFrom, bans: BanList
+    ) -> Generator[tuple[str, Ban]]:
+        banned: list[tuple[str, Ban]] = []
         if isinstance(node, ast.Import):
-            module_names = [alias.name for alias in node.names]
-        elif isinstance(node, ast.ImportFrom):
-            node_module = node.module or ""
-            module_names = [node_module]
             for alias in node.names:
-                module_names.append(f"{node_module}.{alias.name}")
+                ban = bans.lookup(alias.name)
+                if ban is not None:
+                    banned.append((alias.name, ban))
         else:
-            return
+            node_module = node.module or ""
+            ban = bans.lookup(node_module)
+            if ban is not None:
+                banned.append((node_module, ban))
+            banned.extend(
+                bans.children(node_module, [alias.name for alias in node.names])
+            )
 
         # Sort from most to least specific paths.
-        module_names.sort(key=len, reverse=True)
+        banned.sort(key=lambda item: len(item[0]), reverse=True)
 
+        # The warned modules and all their parent modules.
         warned: set[str] = set()
 
-        for module_name in module_names:
-            is_banned, msg = self._is_module_banned(module_name)
-            if is_banned:
-                message = self.message_I251.format(name=module_name, msg=msg)
-                if any(mod.startswith(module_name) for mod in warned):
-                    # Do not show an error for this line if we already showed
-                    # a more specific error.
-                    continue
-                else:
-                    warned.add(module_name)
-                yield (node.lineno, node.col_offset, message, type(self))
+        for module_name, ban in banned:
+            if module_name in warned:
+                # Do not show an error for this line if we already showed
+                # a more specific error.
+                continue
+            prefix = module_name
+            while prefix not in warned:
+                warned.add(prefix)
+                prefix, dot, _ = prefix.rpartition(".")
+                if not dot:
+                    break
+            if self.stats is not None:
+                self.stats.counts[f"{ban.kind} ban matches"] += 1
+                self.stats.ban_matches[ban.line] += 1
+            yield module_name, ban
+
+    def rule_I251(self, node: ast.AST) -> Generator[tuple[int, int, str, type[Any]]]:
+        if not isinstance(node, (ast.Import, ast.ImportFrom)):
+            return
+        for module_name, ban in self._banned_imports(node, self.config.banned_modules):
+            message = self.message_I251.format(name=module_name, msg=ban.message)
+            yield (node.lineno, node.col_offset, message, type(self))
 
     def rule_I252(self, node: ast.AST) -> Generator[tuple[int, int, str, type[Any]]]:
-        if self.ban_relative_imports == "":
+        ban_relative_imports = self.config.ban_relative_imports
+        if ban_relative_imports == "":
             return
-        elif self.ban_relative_imports == "parents":
+        elif ban_relative_imports == "parents":
             min_node_level = 1
             message = "I252 Relative imports from parent modules are banned."
         else:
@@ -204,386 +771,48 @@ class ImportChecker:
         if isinstance(node, ast.ImportFrom) and node.level > min_node_level:
             yield (node.lineno, node.col_offset, message, type(self))
 
-    python2to3_banned_modules = {
-        "__builtin__": "use six.moves.builtins as a drop-in replacement",
-        "_winreg": "use six.moves.winreg as a drop-in replacement",
-        "anydbm": "use dbm as a drop-in replacement",
-        "asynchat.fifo": "removed in Python 3",
-        "audiodev": "removed in Python 3",
-        "BaseHTTPServer": "use six.moves.BaseHTTPServer as a drop-in replacement",
-        "Bastion": "removed in Python 3",
-        "bsddb185": "use bsddb3 instead",
-        "Canvas": "removed in Python 3",
-        "cfmfile": "removed in Python 3",
-        "CGIHTTPServer": "use six.moves.CGIHTTPServer as a drop-in replacement",
-        "cl": "removed in Python 3",
-        "commands": "removed in Python 3, use subprocess instead",
-        "compiler": "removed in Python 3, use ast instead",
-        "ConfigParser": "use six.moves.configparser as a drop-in replacement",
-        "contextlib.nested": (
-            "use contextlib2.ExitStack or the shim in "
-            + "http://stackoverflow.com/a/39158985/303931"
-        ),
-        "Cookie": "use six.moves.http_cookies as a drop-in replacement",
-        "cookielib": "use six.moves.http_cookiejar as a drop-in replacement",
-        "copy_reg": "use six.moves.copyreg as a drop-in replacement",
-        "cPickle": "use six.moves.cPickle as a drop-in replacement",
-        "cStringIO": "moved in Python 3, use io.StringIO or io.BytesIO instead",
-        "Dialog": "use six.moves.tkinter_dialog as a drop-in replacement",
-        "dircache": "removed in Python 3",
-        "dl": "removed in Python 3, use ctypes instead",
-        "DocXMLRPCServer": "use six.moves.xmlrpc_server instead",
-        "dummy_thread": "use six.moves._dummy_thread as a drop-in replacement",
-        "email.MIMEBase": "use six.moves.email_mime_base as a drop-in replacement",
-        "email.MIMEMultipart": (
-            "use six.moves.email_mime_multipart as a" + " drop-in replacement"
-        ),
-        "email.MIMENonMultipart": (
-            "use six.moves.email_mime_nonmultipart as" + " a drop-in replacement"
-        ),
-        "email.MIMEText": "use six.moves.email_mime_text as a drop-in replacement",
-        "FileDialog": "use six.moves.tkinter_filedialog as a drop-in replacement",
-        "fpformat": "removed in Python 3",
-        "ftplib.Netrc": "removed in Python 3",
-        "functools.wraps": "use six.wraps as a drop-in replacement",
-        "gdbm": "use six.moves.dbm_gnu as a drop-in replacement",
-        "htmlentitydefs": "use six.moves.html_entities as a drop-in replacement",
-        "htmllib": "use six.moves.html_parser instead",
-        "HTMLParser": (
-            "use six.moves.html_parser as a drop-in replacement"
-            + " (except for HTMLParserError)"
-        ),
-        "HTMLParser.HTMLParseError": "removed in Python 3.5+",
-        "httplib": "use six.moves.http_client as a drop-in replacement",
-        "ihooks": "removed in Python 3",
-        "imageop": "removed in Python 3, use PIL/Pillow instead",
-        "imputil": "removed in Python 3",
-        "inspect.getmoduleinfo": "moved in Python 3, use inspect.getmodulename instead",
-        "itertools.ifilter": "use six.moves.filter as a drop-in replacement",
-        "itertools.ifilterfalse": "use six.moves.filterfalse as a drop-in replacement",
-        "itertools.imap": "use six.moves.map as a drop-in replacement",
-        "itertools.izip": "use six.moves.zip as a drop-in replacement",
-        "itertools.izip_longest": "use six.moves.zip_longest as a drop-in replacement",
-        "linuxaudiodev": "moved in Python 3, use ossaudiodev instead",
-        "markupbase": "moved in Python 3, use _markupbase instead",
-        "md5": "removed in Python 3, use hashlib.md5() instead",
-        "mhlib": "removed in Python 3, use mailbox instead",
-        "mimetools": "moved in Python 3, use email instead",
-        "MimeWriter": "moved in Python 3, use email instead",
-        "mimify": "removed in Python 3, use email instead",
-        "multifile": "removed in Python 3, use email instead",
-        "mutex": "removed in Python 3",
-        "new": "removed in Python 3",
-        "os.getcwd": "use six.moves.getcwdb as a drop-in replacement",
-        "os.getcwdu": "use six.moves.getcwd as a drop-in replacement",
-        "pipes.quote": "use six.moves.shlex_quote as a drop-in replacement",
-        "platform._bcd2str": "removed in Python 3",
-        "platform._mac_ver_gstalt": "removed in Python 3",
-        "platform._mac_ver_lookup": "removed in Python 3",
-        "plistlib.readPlist": "moved in Python 3, use plistlib.load instead",
-        "plistlib.readPlistFromBytes": "moved in Python 3, use plistlib.loads instead",
-        "plistlib.writePlist": "moved in Python 3, use plistlib.dump instead",
-        "plistlib.writePlistToBytes": "moved in Python 3, use plistlib.dumps instead",
-        "popen2": "moved in Python 3, use subprocess instead",
-        "posixfile": "moved in Python 3, use fcntl.lockf instead",
-        "pure": "removed in Python 3",
-        "pydoc.Scanner": "removed in Python 3",
-        "Queue": "use six.moves.queue as a drop-in replacement",
-        "repr": "use six.moves.reprlib as a drop-in replacement",
-        "rexec": "removed in Python 3",
-        "rfc822": "moved in Python 3, use email instead",
-        "robotparser": "use six.moves.urllib.robotparser as a drop-in replacement",
-        "ScrolledText": "use six.moves.tkinter_scrolledtext as a drop-in replacement",
-        "sgmllib": "removed in Python 3",
-        "sha": "moved in Python 3, use hashlib.sha1() instead",
-        "SimpleDialog": "use six.moves.tkinter_simpledialog as a drop-in replacement",
-        "SimpleHTTPServer": "use six.moves.SimpleHTTPServer as a drop-in replacement",
-        "SimpleXMLRPCServer": "use six.moves.xmlrpc_server as a drop-in replacement",
-        "smtplib.SSLFakeFile": "moved in Python 3, use socket.socket.makefile instead",
-        "SocketServer": "use six.moves.socketserver as a drop-in replacement",
-        "sre": "moved in Python 3, use re instead",
-        "statvfs": "moved in Python 3, use os.statvfs instead",
-        "string.atof": "moved in Python 3, use float() as a drop-in replacement",
-        "string.atoi": "moved in Python 3. use int() as a drop-in replacement",
-        "string.atol": "moved in Python 3. use int() as a drop-in replacement",
-        "string.capitalize": "removed in Python 3",
-        "string.center": "removed in Python 3",
-        "string.count": "removed in Python 3",
-        "string.expandtabs": "removed in Python 3",
-        "string.find": "removed in Python 3",
-        "string.index": "removed in Python 3",
-        "string.join": "removed in Python 3",
-        "string.joinfields": "removed in Python 3",
-        "string.letters": (
-            "moved in Python 3, use string.ascii_letters as a" + " drop-in replacement"
-        ),
-        "string.ljust": "removed in Python 3",
-        "string.lower": "removed in Python 3",
-        "string.lowercase": (
-            "moved in Python 3, use string.ascii_lowercase as"
-            + " a drop-in replacement"
-        ),
-        "string.lstrip": "removed in Python 3",
-        "string.maketrans": (
-            "moved in Python 3, use bytes.maketrans or"
-            + " bytearray.maketrans or a dict of unicode codepoints to"
-            + " substitutions instead"
-        ),
-        "string.replace": "removed in Python 3",
-        "string.rfind": "removed in Python 3",
-        "string.rindex": "removed in Python 3",
-        "string.rjust": "removed in Python 3",
-        "string.rsplit": "removed in Python 3",
-        "string.rstrip": "removed in Python 3",
-        "string.split": "removed in Python 3",
-        "string.splitfields": "removed in Python 3",
-        "string.strip": "removed in Python 3",
-        "string.swapcase": "removed in Python 3",
-        "string.translate": "removed in Python 3",
-        "string.upper": "removed in Python 3",
-        "string.uppercase": (
-            "moved in Python 3, use string.ascii_uppercase as a drop-in replacement"
-        ),
-        "string.zfill": "removed in Python 3",
-        "StringIO": "moved in Python 3, use io.StringIO or io.BytesIO instead",
-        "stringold": "removed in Python 3",
-        "sunaudio": "removed in Python 3",
-        "sv": "removed in Python 3",
-        "tarfile.S_IFBLK": (
-            "moved in Python 3, use stat.S_IFBLK as a drop-in replacement"
-        ),
-        "tarfile.S_IFCHR": (
-            "moved in Python 3, use stat.S_IFCHR as a drop-in replacement"
-        ),
-        "tarfile.S_IFDIR": (
-            "moved in Python 3, use stat.S_IFDIR as a drop-in replacement"
-        ),
-        "tarfile.S_IFIFO": (
-            "moved in Python 3, use stat.S_IFIFO as a drop-in replacement"
-        ),
-        "tarfile.S_IFLNK": (
-            "moved in Python 3, use stat.S_IFLNK as a drop-in replacement"
-        ),
-        "tarfile.S_IFREG": (
-            "moved in Python 3, use stat.S_IFREG as a drop-in replacement"
-        ),
-        "test.test_support": "moved in Python 3, use test.support instead",
-        "test.testall": "removed in Python 3",
-        "thread": "moved in Python 3, use six.moves._thread as a drop-in replacement",
-        "time.accept2dyear": "removed in Python 3",
-        "timing": "moved in Python 3, use time.clock instead",
-        "Tix": "use six.moves.tkinter_tix as a drop-in replacement",
-        "tkColorChooser": "use six.moves.tkinter_colorchooser as a drop-in replacement",
-        "tkCommonDialog": "use six.moves.tkinter_commondialog as a drop-in replacement",
-        "Tkconstants": "use six.moves.tkinter_constants as a drop-in replacement",
-        "Tkdnd": "use six.moves.tkinter_dnd as a drop-in replacement",
-        "tkFileDialog": "use six.moves.tkinter_tkfiledialog as a drop-in replacement",
-        "tkFont": "use six.moves.tkinter_font as a drop-in replacement",
-        "Tkinter": "use six.moves.tkinter as a drop-in replacement",
-        "tkMessageBox": "use six.moves.tkinter_messagebox as a drop-in replacement",
-        "tkSimpleDialog": (
-            "use six.moves.tkinter_tksimpledialog as a drop-in replacement"
-        ),
-        "toaiff": "removed in Python 3",
-        "ttk": "use six.moves.tkinter_ttk as a drop-in replacement",
-        "types.BooleanType": "moved in Python 3, use bool as a drop-in replacement",
-        "types.BufferType": "removed in Python 3",
-        "types.ClassType": "removed in Python 3",
-        "types.ComplexType": "moved in Python 3, use complex as a drop-in replacement",
-        "types.DictionaryType": "removed in Python 3",
-        "types.DictProxyType": "removed in Python 3",
-        "types.DictType": "moved in Python 3, use dict as a drop-in replacement",
-        "types.EllipsisType": (
-            "moved in Python 3, use type(Ellipsis) as a drop-in replacement"
-        ),
-        "types.FileType": "removed in Python 3",
-        "types.FloatType": "moved in Python 3, use float as a drop-in replacement",
-        "types.InstanceType": "removed in Python 3",
-        "types.IntType": "use six.integer_types as a drop-in replacement",
-        "types.ListType": "moved in Python 3, use list as a drop-in replacement",
-        "types.LongType": "removed in Python 3",
-        "types.NoneType": "moved in Python 3, use type(None) as a drop-in replacement",
-        "types.NotImplementedType": "removed in Python 3",
-        "types.ObjectType": "removed in Python 3",
-        "types.SliceType": "removed in Python 3",
-        "types.StringType": (
-            "use six.binary_types or six.text_types, depending on context, instead"
-        ),
-        "types.StringTypes": "use six.string_types as a drop-in replacement",
-        "types.TupleType": "moved in Python 3, use tuple as a drop-in replacement",
-        "types.TypeType": "use six.class_types as a drop-in replacement",
-        "types.UnboundMethodType": "removed in Python 3",
-        "types.UnicodeType": "use six.text_type as a drop-in replacement",
-        "types.XRangeType": "removed in Python 3",
-        "urllib.ContentTooShortError": (
-            "use six.moves.urllib.error.ContentTooShortError as a drop-in replacement"
-        ),
-        "urllib.FancyURLopener": (
-            "use six.moves.urllib.request.FancyURLopener as a drop-in replacement"
-        ),
-        "urllib.getproxies": (
-            "use six.moves.urllib.request.getproxies as a drop-in replacement"
-        ),
-        "urllib.pathname2url": (
-            "use six.moves.urllib.request.pathname2url as a drop-in replacement"
-        ),
-        "urllib.proxy_bypass": (
-            "use six.moves.urllib.request.proxy_bypass as a drop-in replacement"
-        ),
-        "urllib.quote": "use six.moves.urllib.parse.quote as a drop-in replacement",
-        "urllib.quote_plus": (
-            "use six.moves.urllib.parse.quote_plus as a drop-in replacement"
-        ),
-        "urllib.splitattr": "moved in Python 3, use urllib.parse.splitattr instead",
-        "urllib.splithost": "moved in Python 3, use urllib.parse.splithost instead",
-        "urllib.splitnport": "moved in Python 3, use urllib.parse.splitnport instead",
-        "urllib.splitpasswd": "moved in Python 3, use urllib.parse.splitpasswd instead",
-        "urllib.splitport": "moved in Python 3, use urllib.parse.splitport instead",
-        "urllib.splitquery": (
-            "use six.moves.urllib.parse.splitquery as a drop-in replacement"
-        ),
-        "urllib.splittag": (
-            "use six.moves.urllib.parse.splittag as a drop-in replacement"
-        ),
-        "urllib.splittype": "moved in Python 3, use urllib.parse.splittype instead",
-        "urllib.splituser": (
-            "use six.moves.urllib.parse.splituser as a drop-in replacement"
-        ),
-        "urllib.splitvalue": "moved in Python 3, use urllib.parse.splitvalue instead",
-        "urllib.unquote": "use six.moves.urllib.parse.unquote as a drop-in replacement",
-        "urllib.unquote_plus": (
-            "use six.moves.urllib.parse.unquote_plus as a drop-in replacement"
-        ),
-        "urllib.url2pathname": (
-            "use six.moves.urllib.request.url2pathname as a drop-in replacement"
-        ),
-        "urllib.urlcleanup": (
-            "use six.moves.urllib.request.urlcleanup as a drop-in replacement"
-        ),
-        "urllib.urlencode": (
-            "use six.moves.urllib.parse.urlencode as a drop-in replacement"
-        ),
-        "urllib.URLopener": (
-            "use six.moves.urllib.request.URLopener as a drop-in replacement"
-        ),
-        "urllib.urlretrieve": (
-            "use six.moves.urllib.request.urlretrieve as a drop-in replacement"
-        ),
-        "urllib2": "use six.moves.urllib instead",
-        "urllib2.AbstractBasicAuthHandler": (
-            "use six.moves.urllib.request.AbstractBasicAuthHandler as a"
-            + " drop-in replacement"
-        ),
-        "urllib2.AbstractDigestAuthHandler": (
-            "use six.moves.urllib.request.AbstractDigestAuthHandler as a"
-            + " drop-in replacement"
-        ),
-        "urllib2.BaseHandler": (
-            "use six.moves.urllib.request.BaseHandler as a drop-in replacement"
-        ),
-        "urllib2.build_opener": (
-            "use six.moves.urllib.request.build_opener as a drop-in replacement"
-        ),
-        "urllib2.CacheFTPHandler": (
-            "use six.moves.urllib.request.CacheFTPHandler as a drop-in replacement"
-        ),
-        "urllib2.FileHandler": (
-            "use six.moves.urllib.request.FileHandler as a drop-in replacement"
-        ),
-        "urllib2.FTPHandler": (
-            "use six.moves.urllib.request.FTPHandler as a drop-in replacement"
-        ),
-        "urllib2.HTTPBasicAuthHandler": (
-            "use six.moves.urllib.request.HTTPBasicAuthHandler as a drop-in replacement"
-        ),
-        "urllib2.HTTPCookieProcessor": (
-            "use six.moves.urllib.request.HTTPCookieProcessor as a drop-in replacement"
-        ),
-        "urllib2.HTTPDefaultErrorHandler": (
-            "use six.moves.urllib.request.HTTPDefaultErrorHandler as a drop-in"
-            + " replacement"
-        ),
-        "urllib2.HTTPDigestAuthHandler": (
-            "use six.moves.urllib.request.HTTPDigestAuthHandler as a drop-in"
-            + " replacement"
-        ),
-        "urllib2.HTTPError": (
-            "use six.moves.urllib.error.HTTPError as a drop-in replacement"
-        ),
-        "urllib2.HTTPErrorProcessor": (
-            "use six.moves.urllib.request.HTTPErrorProcessor as a drop-in replacement"
-        ),
-        "urllib2.HTTPHandler": (
-            "use six.moves.urllib.request.HTTPHandler as a drop-in replacement"
-        ),
-        "urllib2.HTTPPasswordMgr": (
-            "use six.moves.urllib.request.HTTPPasswordMgr as a drop-in replacement"
-        ),
-        "urllib2.HTTPPasswordMgrWithDefaultRealm": (
-            "use six.moves.urllib.request.HTTPPasswordMgrWithDefaultRealm as"
-            + " a drop-in replacement"
-        ),
-        "urllib2.HTTPRedirectHandler": (
-            "use six.moves.urllib.request.HTTPRedirectHandler as a drop-in replacement"
-        ),
-        "urllib2.HTTPSHandler": (
-            "use six.moves.urllib.request.HTTPSHandler as a drop-in replacement"
-        ),
-        "urllib2.install_opener": (
-            "use six.moves.urllib.request.install_opener as a drop-in replacement"
-        ),
-        "urllib2.OpenerDirector": (
-            "use six.moves.urllib.request.OpenerDirector as a drop-in replacement"
-        ),
-        "urllib2.ProxyBasicAuthHandler": (
-            "use six.moves.urllib.request.ProxyBasicAuthHandler as a drop-in"
-            + " replacement"
-        ),
-        "urllib2.ProxyDigestAuthHandler": (
-            "use six.moves.urllib.request.ProxyDigestAuthHandler as a drop-in"
-            + " replacement"
-        ),
-        "urllib2.ProxyHandler": (
-            "use six.moves.urllib.request.ProxyHandler as a drop-in replacement"
-        ),
-        "urllib2.quote": "use six.moves.urllib.parse.quote as a drop-in replacement",
-        "urllib2.Request": (
-            "use six.moves.urllib.request.Request as a drop-in replacement"
-        ),
-        "urllib2.UnknownHandler": (
-            "use six.moves.urllib.request.UnknownHandler as a drop-in replacement"
-        ),
-        "urllib2.unquote": (
-            "use six.moves.urllib.parse.unquote as a drop-in replacement"
-        ),
-        "urllib2.URLError": (
-            "use six.moves.urllib.error.URLError as a drop-in replacement"
-        ),
-        "urllib2.urlopen": (
-            "use six.moves.urllib.request.urlopen as a drop-in replacement"
-        ),
-        "urlparse": "use six.moves.urllib.parse as a drop-in replacement",
-        "urlparse.scheme_chars": "moved in Python 3, use urllib.parse.scheme_chars",
-        "user": "removed in Python 3",
-        "UserDict": (
-            "moved in Python 3, use dict or collections.UserDict or"
-            + " collections.MutableMapping instead"
-        ),
-        "UserDict.UserDict": (
-            "moved in Python 3, use six.moves.UserDict as a drop-in replacement"
-        ),
-        "UserDict.UserDictMixin": (
-            "moved in Python 3, use collections.MutableMapping instead"
-        ),
-        "UserList": (
-            "moved in Python 3, use list or collections.UserList or"
-            + " collections.MutableSequence instead"
-        ),
-        "UserList.UserList": "use six.moves.UserList as a drop-in replacement",
-        "UserString": (
-            "moved in Python 3, use six.text_type, six.binary_type or"
-            + " collections.UserString instead"
-        ),
-        "UserString.UserString": "use six.moves.UserString as a drop-in replacement",
-        "xmlrpclib": "use six.moves.xmlrpc_client as a drop-in replacement",
-    }
+    @cached_property
+    def _module_level_imports(self) -> set[ast.AST]:
+        # The imports that run when the module is imported, so not those in
+        # function bodies, which run later, or "if TYPE_CHECKING:" blocks,
+        # which never run.
+        imports: set[ast.AST] = set()
+        container_types = self._import_container_types
+        stack = [self.tree]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, (ast.Import, ast.ImportFrom)):
+                imports.add(node)
+                continue
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                continue
+            for field in self._statement_list_fields:
+                if field == "body" and _is_type_checking_block(node):
+                    continue
+                value = getattr(node, field, None)
+                if isinstance(value, list):
+                    stack.extend(
+                        child for child in value if type(child) in container_types
+                    )
+        return imports
+
+    def rule_I253(self, node: ast.AST) -> Generator[tuple[int, int, str, type[Any]]]:
+        if (
+            not isinstance(node, (ast.Import, ast.ImportFrom))
+            or node not in self._module_level_imports
+        ):
+            return
+        bans = self.config.banned_module_level_imports
+        for module_name, ban in self._banned_imports(node, bans):
+            message = self.message_I253.format(name=module_name, msg=ban.message)
+            yield (node.lineno, node.col_offset, message, type(self))
+
+
+def _is_type_checking_block(node: ast.AST) -> bool:
+    # Matches "if TYPE_CHECKING:" and "if typing.TYPE_CHECKING:".
+    if not isinstance(node, ast.If):
+        return False
+    test = node.test
+    return (isinstance(test, ast.Name) and test.id == "TYPE_CHECKING") or (
+        isinstance(test, ast.Attribute) and test.attr == "TYPE_CHECKING"
+    )
@@ -0,0 +1,416 @@
+"""
+Run flake8-tidy-imports' rules without flake8, with:
+
+    python -m flake8_tidy_imports [paths ...]
+
+This skips flake8's startup and its other plugins, so it suits large scans
+that only need the import rules. Options are read from the same [flake8]
+configuration section, and output uses flake8's default format.
+"""
+
+from __future__ import annotations
+
+import argparse
+import ast
+import configparser
+import os
+import re
+import sys
+import tokenize
+from collections.abc import Iterator, Sequence
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from fnmatch import fnmatch
+from functools import partial
+from importlib.util import decode_source
+from io import StringIO
+from typing import Any, cast
+
+from flake8.options.manager import OptionManager
+
+from . import Config, ImportChecker
+from ._scan import scan_imports
+
+# The configuration files that flake8 reads, in order of precedence.
+CONFIG_FILES = ("setup.cfg", "tox.ini", ".flake8")
+
+DEFAULT_EXCLUDE = ".svn,CVS,.bzr,.hg,.git,__pycache__,.tox,.nox,.eggs,*.egg"
+
+# From flake8.defaults.
+NOQA_INLINE_REGEX = re.compile(
+    r"# noqa(?::[\s]?(?P<codes>([A-Z]+[0-9]+(?:[,\s]+)?)+))?",
+    re.IGNORECASE,
+)
+# flake8's file-level pattern, applied to each line.
+NOQA_FILE_REGEX = re.compile(
+    r"^[^\S\n]*# flake8[:=][^\S\n]*noqa", re.IGNORECASE | re.MULTILINE
+)
+
+Result = tuple[int, int, str]
+
+
+class OptionAdapter:
+    """
+    Adapt ImportChecker.add_options() to argparse, recording which options
+    flake8 would read from configuration files.
+    """
+
+    def __init__(self, parser: argparse.ArgumentParser) -> None:
+        self.parser = parser
+        self.config_options: dict[str, argparse.Action] = {}
+
+    def add_option(
+        self, *args: Any, parse_from_config: bool = False, **kwargs: Any
+    ) -> None:
+        action = self.parser.add_argument(*args, **kwargs)
+        if parse_from_config:
+            self.config_options[action.dest.replace("_", "-")] = action
+
+
+def make_parser() -> tuple[argparse.ArgumentParser, OptionAdapter]:
+    parser = argparse.ArgumentParser(
+        prog="python -m flake8_tidy_imports",
+        description="Check imports with flake8-tidy-imports' rules, without flake8.",
+    )
+    parser.add_argument(
+        "paths",
+        nargs="*",
+        help="Files and directories to check. Defaults to the current directory.",
+    )
+    parser.add_argument(
+        "--file-list",
+        metavar="FILE",
+        help="Also check the files listed in FILE, one per line, or - for stdin.",
+    )
+    parser.add_argument(
+        "--config",
+        help="Configuration file to read, instead of searching for one.",
+    )
+    adapter = OptionAdapter(parser)
+    adapter.add_option(
+        "-j",
+        "--jobs",
+        parse_from_config=True,
+        default="auto",
+        help="Number of processes to use, or 'auto' for one per CPU.",
+    )
+    adapter.add_option(
+        "--exclude",
+        parse_from_config=True,
+        default=DEFAULT_EXCLUDE,
+        help="Comma-separated patterns of files and directories to skip.",
+    )
+    adapter.add_option(
+        "--extend-exclude",
+        parse_from_config=True,
+        default="",
+        help="Comma-separated patterns to skip, in addition to --exclude.",
+    )
+    adapter.add_option(
+        "--select",
+        parse_from_config=True,
+        default="",
+        help="Comma-separated error code prefixes to report, or all if unset.",
+    )
+    adapter.add_option(
+        "--extend-select",
+        parse_from_config=True,
+        default="",
+        help="Comma-separated error code prefixes to report, in addition to --select.",
+    )
+    adapter.add_option(
+        "--ignore",
+        parse_from_config=True,
+        default="",
+        help="Comma-separated error code prefixes to ignore.",
+    )
+    adapter.add_option(
+        "--extend-ignore",
+        parse_from_config=True,
+        default="",
+        help="Comma-separated error code prefixes to ignore, in addition to --ignore.",
+    )
+    parser.add_argument(
+        "--threads",
+        action="store_true",
+        help=(
+            "Check files in a pool of --jobs threads, rather than processes. "
+            + "This is only faster on free-threaded builds of Python."
+        ),
+    )
+    parser.add_argument(
+        "--fast-scan",
+        action="store_true",
+        help=(
+            "Find imports with a lightweight scanner instead of parsing whole "
+            + "files. Syntax errors outside of import statements are not reported."
+        ),
+    )
+    ImportChecker.add_options(cast(OptionManager, adapter))
+    return parser, adapter
+
+
+def find_config(start: str) -> str | None:
+    """
+    Find the configuration file that flake8 would use, searching from the
+    start directory upwards.
+    """
+    home = os.path.expanduser("~")
+    directory = os.path.abspath(start)
+    while True:
+        for name in CONFIG_FILES:
+            path = os.path.join(directory, name)
+            parser = configparser.RawConfigParser()
+            try:
+                parser.read(path, encoding="utf-8")
+            except (UnicodeDecodeError, configparser.ParsingError):
+                continue
+            if parser.has_section("flake8"):
+                return path
+        parent = os.path.dirname(directory)
+        if parent == directory or directory == home:
+            return None
+        directory = parent
+
+
+def apply_config(
+    parser: argparse.ArgumentParser, adapter: OptionAdapter, path: str
+) -> None:
+    """
+    Use values from the [flake8] section of the given file as the parser's
+    defaults, so the command line overrides them.
+    """
+    config = configparser.RawConfigParser()
+    with open(path, encoding="utf-8") as f:
+        config.read_file(f)
+    if not config.has_section("flake8"):
+        return
+    config_dir = os.path.dirname(os.path.abspath(path))
+    for key, value in config.items("flake8"):
+        name = key.replace("_", "-")
+        action = adapter.config_options.get(name)
+        if action is None:
+            continue
+        parsed: str | bool
+        if action.nargs == 0:
+            # A store_true flag.
+            parsed = config.getboolean("flake8", key)
+        elif action.choices is not None and value not in action.choices:
+            parser.error(f"invalid value for {key} in {path}: {value!r}")
+        elif name in ("exclude", "extend-exclude"):
+            # Like flake8, patterns containing a path are relative to the
+            # configuration file.
+            parsed = ",".join(
+                os.path.join(config_dir, pattern) if "/" in pattern else pattern
+                for pattern in split_list(value)
+            )
+        else:
+            parsed = value
+        parser.set_defaults(**{action.dest: parsed})
+
+
+def split_list(value: str) -> list[str]:
+    return [item for item in re.split(r"[,\s]+", value) if item]
+
+
+def is_excluded(path: str, patterns: Sequence[str]) -> bool:
+    absolute = os.path.abspath(path)
+    basename = os.path.basename(absolute)
+    return any(
+        fnmatch(basename, pattern) or fnmatch(absolute, os.path.abspath(pattern))
+        for pattern in patterns
+    )
+
+
+def expand_paths(paths: Sequence[str], exclude: Sequence[str]) -> Iterator[str]:
+    for path in paths:
+        if is_excluded(path, exclude):
+            continue
+        if not os.path.isdir(path):
+            yield path
+            continue
+        for root, dirs, files in os.walk(path):
+            dirs[:] = sorted(
+                name
+                for name in dirs
+                if not is_excluded(os.path.join(root, name), exclude)
+            )
+            for name in sorted(files):
+                filename = os.path.join(root, name)
+                if name.endswith(".py") and not is_excluded(filename, exclude):
+                    yield filename
+
+
+def check_file(path: str, fast_scan: bool = False) -> list[Result]:
+    """
+    Return the errors for a file as (row, column, text) tuples, as flake8
+    would report them, after applying "# noqa" comments.
+    """
+    try:
+        with open(path, "rb") as f:
+            source = decode_source(f.read())
+    except OSError as exc:
+        # Like flake8, report unreadable files rather than stopping the run.
+        return [(0, 1, f"E902 {type(exc).__name__}: {exc}")]
+    except SyntaxError as exc:
+        # An invalid encoding declaration.
+        return [
+            (exc.lineno or 1, (exc.offset or 0) + 1, f"E999 SyntaxError: {exc.msg}")
+        ]
+    except UnicodeDecodeError as exc:
+        return [(1, 1, f"E999 UnicodeDecodeError: {exc}")]
+    if NOQA_FILE_REGEX.search(source):
+        return []
+    tree = None
+    # The scan loses the statements enclosing imports, which I253 needs.
+    if fast_scan and not ImportChecker.config.banned_module_level_imports:
+        tree = scan_imports(source)
+    try:
+        if tree is None:
+            tree = ast.parse(source, filename=path)
+    except SyntaxError as exc:
+        # flake8 reports one column past the offset.
+        return [
+            (exc.lineno or 1, (exc.offset or 0) + 1, f"E999 SyntaxError: {exc.msg}")
+        ]
+
+    errors = sorted(ImportChecker(tree).run())
+    if not errors:
+        return []
+
+    noqa_lines = noqa_line_mapping(source)
+    results = []
+    for row, col, text, _ in errors:
+        match = NOQA_INLINE_REGEX.search(noqa_lines.get(row, ""))
+        if match is not None:
+            codes = match.group("codes")
+            if codes is None:
+                continue
+            code = text.split(" ", 1)[0]
+            if code.startswith(tuple(split_list(codes))):
+                continue
+        results.append((row, col + 1, text))
+    return results
+
+
+def noqa_line_mapping(source: str) -> dict[int, str]:
+    """
+    Map line numbers to the text searched for "# noqa" comments. Like flake8,
+    lines joined by a token, such as a multi-line string, share their text.
+    """
+    lines = source.splitlines(keepends=True)
+    mapping = dict(enumerate(lines, start=1))
+    try:
+        tokens = list(tokenize.generate_tokens(StringIO(source).readline))
+    except (tokenize.TokenError, SyntaxError):
+        return mapping
+
+    min_line = len(lines) + 2
+    max_line = -1
+    for token in tokens:
+        if token.type in (tokenize.ENDMARKER, tokenize.DEDENT):
+            continue
+        min_line = min(min_line, token.start[0])
+        max_line = max(max_line, token.end[0])
+        if token.type in (tokenize.NL, tokenize.NEWLINE):
+            joined = "".join(lines[min_line - 1 : max_line])
+            for line in range(min_line, max_line + 1):
+                mapping[line] = joined
+            min_line = len(lines) + 2
+            max_line = -1
+    return mapping
+
+
+def is_selected(code: str, select: Sequence[str], ignore: Sequence[str]) -> bool:
+    """
+    Decide whether to report an error code like flake8, where the longest
+    matching prefix of --select and --ignore wins.
+    """
+    selected = max(
+        (len(prefix) for prefix in select if code.startswith(prefix)), default=-1
+    )
+    if not select:
+        selected = 0
+    ignored = max(
+        (len(prefix) for prefix in ignore if code.startswith(prefix)), default=-1
+    )
+    return selected > ignored
+
+
+def init_worker(config: Config, stats: bool) -> None:
+    # Receive the config compiled by the main process, rather than parsing
+    # the options again.
+    ImportChecker.config = config
+    if stats:
+        from ._stats import Stats
+
+        ImportChecker.stats = Stats.start()
+    else:
+        ImportChecker.stats = None
+
+
+def check_paths(
+    paths: Sequence[str], options: argparse.Namespace
+) -> list[list[Result]]:
+    if options.jobs == "auto":
+        jobs = os.cpu_count() or 1
+    else:
+        jobs = int(options.jobs)
+    jobs = min(jobs, len(paths))
+    check = partial(check_file, fast_scan=options.fast_scan)
+
+    if jobs <= 1:
+        return [check(path) for path in paths]
+
+    if options.threads:
+        with ThreadPoolExecutor(jobs) as thread_executor:
+            return list(thread_executor.map(check, paths))
+
+    with ProcessPoolExecutor(
+        jobs,
+        initializer=init_worker,
+        initargs=(ImportChecker.config, options.tidy_imports_stats),
+    ) as executor:
+        chunksize = max(1, len(paths) // (jobs * 4))
+        return list(executor.map(check, paths, chunksize=chunksize))
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser, adapter = make_parser()
+    known, _ = parser.parse_known_args(argv)
+    config = known.config if known.config is not None else find_config(".")
+    if config is not None:
+        apply_config(parser, adapter, config)
+    options = parser.parse_args(argv)
+    if options.jobs != "auto" and not options.jobs.isdigit():
+        parser.error(f"invalid value for --jobs: {options.jobs!r}")
+    if options.threads and options.tidy_imports_stats:
+        parser.error("--threads cannot be used with --tidy-imports-stats")
+
+    ImportChecker.parse_options(options)
+
+    paths = list(options.paths)
+    if options.file_list is not None:
+        if options.file_list == "-":
+            paths.extend(line.strip() for line in sys.stdin if line.strip())
+        else:
+            with open(options.file_list) as f:
+                paths.extend(line.strip() for line in f if line.strip())
+    elif not paths:
+        paths = ["."]
+    exclude = split_list(options.exclude) + split_list(options.extend_exclude)
+    paths = sorted(set(expand_paths(paths, exclude)))
+
+    select = split_list(options.select) + split_list(options.extend_select)
+    ignore = split_list(options.ignore) + split_list(options.extend_ignore)
+    found = 0
+    for path, results in zip(paths, check_paths(paths, options)):
+        for row, col, text in results:
+            if not is_selected(text.split(" ", 1)[0], select, ignore):
+                continue
+            print(f"{path}:{row}:{col}: {text}")
+            found += 1
+    return 1 if found else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
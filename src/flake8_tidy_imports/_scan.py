@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import ast
+import re
+
+# Finds comments, strings, and "import" or "from" keywords that start a
+# statement: at the start of a line, or after ";" or a compound statement's
+# ":". As both words are hard keywords, outside of strings and comments they
+# can only start a statement, continue a line, or follow "yield" or "raise".
+# Strings and comments are matched whole so that their contents are skipped.
+_TOKEN_RE = re.compile(
+    r"""
+    \#[^\n]*
+    | '''[^'\\]*(?:(?:\\.|'(?!''))[^'\\]*)*'''
+    | \"\"\"[^"\\]*(?:(?:\\.|"(?!""))[^"\\]*)*\"\"\"
+    | '[^'\\\n]*(?:\\.[^'\\\n]*)*'
+    | "[^"\\\n]*(?:\\.[^"\\\n]*)*"
+    | (?P<prefix>^[ \t\f]*|[;:][ \t\f]*)(?P<keyword>import|from)\b
+    """,
+    re.MULTILINE | re.DOTALL | re.VERBOSE,
+)
+
+# The rest of an import statement, which can only contain names, dots,
+# commas, one pair of parentheses, comments within them, and escaped
+# newlines.
+_STATEMENT_RE = re.compile(r"(?:[^;\n#(\\]+|\\\n|\((?:[^)#]+|\#[^\n]*)*\))*")
+
+
+# Below this many characters per "import", scanning costs more than it saves.
+_MIN_CHARACTERS_PER_IMPORT = 100
+
+
+def scan_imports(source: str) -> ast.Module | None:
+    """
+    Find the import statements in source without parsing the rest of it.
+
+    Return a module containing only the import statements, with the same
+    statement positions as in a full parse, or None if the source needs a full
+    parse to be sure of them, or is mostly imports so a full parse is as fast.
+    Syntax errors outside of import statements are not detected.
+    """
+    imports = source.count("import")
+    if imports == 0:
+        return ast.Module(body=[], type_ignores=[])
+    if imports * _MIN_CHARACTERS_PER_IMPORT > len(source):
+        return None
+    if "\r" in source:
+        source = source.replace("\r\n", "\n").replace("\r", "\n")
+
+    # The import statements, each on its line in the source so that parsing
+    # them gives their line numbers.
+    parts = []
+    columns = []
+    lineno = 1
+    scanned = 0
+    # The line that parts ends on.
+    parts_lineno = 1
+    for match in _TOKEN_RE.finditer(source):
+        if match.group("keyword") is None:
+            continue
+        start = match.start("keyword")
+        lineno += source.count("\n", scanned, start)
+        scanned = start
+        line_start = source.rfind("\n", 0, start) + 1
+        prefix = match.group("prefix")
+        if (
+            prefix[:1] not in (";", ":")
+            and source[line_start - 2 : line_start] == "\\\n"
+        ):
+            # A continuation line, e.g. "from foo \\\n import bar".
+            return None
+        statement = _STATEMENT_RE.match(source, match.end())
+        assert statement is not None  # The pattern matches the empty string.
+        snippet = source[start : statement.end()]
+        if lineno > parts_lineno:
+            parts.append("\n" * (lineno - parts_lineno))
+        elif parts:
+            parts.append(";")
+        parts.append(snippet)
+        parts_lineno = lineno + snippet.count("\n")
+        # Column offsets are in UTF-8 bytes.
+        columns.append(len(source[line_start:start].encode()))
+
+    if not columns:
+        return ast.Module(body=[], type_ignores=[])
+    try:
+        module = ast.parse("".join(parts))
+    except SyntaxError:
+        # A "from" after "yield" or "raise", or an invalid import.
+        return None
+    if len(module.body) != len(columns):
+        return None
+
+    for node, col_offset in zip(module.body, columns):
+        if not isinstance(node, (ast.Import, ast.ImportFrom)):
+            return None
+        if node.end_lineno == node.lineno and node.end_col_offset is not None:
+            node.end_col_offset += col_offset - node.col_offset
+        node.col_offset = col_offset
+    return module
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import atexit
+import json
+import os
+import sys
+import tempfile
+from collections import Counter
+
+# Path of the file that each process appends its counts to. Set by the main
+# process and inherited by spawned --jobs workers.
+FILE_ENV_VAR = "_FLAKE8_TIDY_IMPORTS_STATS_FILE"
+
+# Counts in the order they are reported. Other counts are timings, in
+# nanoseconds, with names ending " ns".
+COUNTS = (
+    "files checked",
+    "nodes visited",
+    "imports checked",
+    "ban lookups",
+    "ban lookup cache hits",
+    "exact ban matches",
+    "structured ban matches",
+    "unstructured ban matches",
+)
+
+
+class Stats:
+    """
+    Counters for a flake8 run, collected with --tidy-imports-stats.
+
+    flake8's --jobs workers may exit without running exit hooks, so every
+    process appends its counts to a shared file after checking each file. The
+    main process merges them and prints a summary when it exits.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.counts: Counter[str] = Counter()
+        # Errors reported per banned-modules line.
+        self.ban_matches: Counter[str] = Counter()
+        # The banned-modules lines, to find those that never match.
+        self.ban_lines: list[str] = []
+        # Lookup cache counters already recorded by this process.
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    @classmethod
+    def start(cls) -> Stats:
+        path = os.environ.get(FILE_ENV_VAR)
+        if path is not None:
+            # A spawned worker process.
+            return cls(path)
+
+        fd, path = tempfile.mkstemp(prefix="flake8-tidy-imports-", suffix=".jsonl")
+        os.close(fd)
+        os.environ[FILE_ENV_VAR] = path
+        stats = cls(path)
+        atexit.register(stats.report)
+        return stats
+
+    def record_cache(self, hits: int, misses: int) -> None:
+        self.counts["ban lookups"] += (
+            hits + misses - (self.cache_hits + self.cache_misses)
+        )
+        self.counts["ban lookup cache hits"] += hits - self.cache_hits
+        self.cache_hits = hits
+        self.cache_misses = misses
+
+    def flush(self) -> None:
+        if self.counts or self.ban_matches:
+            with open(self.path, "a") as f:
+                f.write(json.dumps([self.counts, self.ban_matches]) + "\n")
+            self.counts.clear()
+            self.ban_matches.clear()
+
+    def report(self) -> None:
+        self.flush()
+        os.environ.pop(FILE_ENV_VAR, None)
+        totals: Counter[str] = Counter()
+        ban_matches: Counter[str] = Counter()
+        with open(self.path) as f:
+            for line in f:
+                counts, bans = json.loads(line)
+                totals.update(counts)
+                ban_matches.update(bans)
+        os.remove(self.path)
+        print(format_report(totals, ban_matches, self.ban_lines), file=sys.stderr)
+
+
+def format_report(
+    totals: Counter[str], ban_matches: Counter[str], ban_lines: list[str]
+) -> str:
+    lines = ["flake8-tidy-imports stats:"]
+    for name in COUNTS:
+        lines.append(f"  {name}: {totals[name]}")
+    for name in sorted(totals):
+        if name.endswith(" ns"):
+            lines.append(f"  {name[:-3]} time: {totals[name] / 1e6:.3f} ms")
+
+    if ban_matches:
+        lines.append("  matches per ban:")
+        for ban_line, count in ban_matches.most_common():
+            lines.append(f"    {count}: {ban_line}")
+    unmatched = [line for line in ban_lines if line not in ban_matches]
+    if unmatched:
+        lines.append(f"  bans never matched ({len(unmatched)} of {len(ban_lines)}):")
+        for ban_line in unmatched:
+            lines.append(f"    {ban_line}")
+    return "\n".join(lines)
@@ -0,0 +1,181 @@
+"""
+Suggest bans for slow imports, from the output of ``python -X importtime``:
+
+    python -X importtime -c 'import myapp' 2> importtime.txt
+    python -m flake8_tidy_imports.importtime importtime.txt
+
+Modules are ranked by their cumulative import time, and those above a
+threshold are written as a configuration block, with the measured time in
+each message.
+"""
+
+from __future__ import annotations
+
+import argparse
+import re
+import sys
+from collections.abc import Iterable, Sequence
+from fnmatch import fnmatch
+
+# A line of -X importtime output, such as:
+# "import time:       897 |       1959 | _frozen_importlib_external".
+# Lines for modules that were already imported have no timings, and are
+# skipped.
+LINE_RE = re.compile(r"^import time:\s*(\d+)\s*\|\s*(\d+)\s*\|\s*(\S+)\s*$")
+
+OPTIONS = ("banned-module-level-imports", "banned-modules")
+
+DEFAULT_MESSAGES = {
+    "banned-module-level-imports": "import it inside functions, it takes {ms} to import",
+    "banned-modules": "it takes {ms} to import",
+}
+
+
+def parse_importtime(lines: Iterable[str]) -> dict[str, int]:
+    """
+    Return the cumulative import time of each module, in microseconds. When a
+    module appears more than once, such as in profiles of several entry
+    points, its longest time is kept.
+    """
+    times: dict[str, int] = {}
+    for line in lines:
+        match = LINE_RE.match(line)
+        if match is None:
+            continue
+        module = match.group(3)
+        cumulative = int(match.group(2))
+        if cumulative > times.get(module, -1):
+            times[module] = cumulative
+    return times
+
+
+def slow_modules(
+    times: dict[str, int],
+    min_us: int,
+    exclude: Sequence[str] = (),
+    top: int | None = None,
+) -> list[tuple[str, int]]:
+    """
+    Return (module, cumulative microseconds) pairs for modules taking at least
+    min_us to import, slowest first.
+
+    Submodules of a returned module are left out, since they are covered by
+    its wildcard ban, and importing them imports it too.
+    """
+    ranked = sorted(
+        (
+            (module, cumulative)
+            for module, cumulative in times.items()
+            if cumulative >= min_us
+            and not any(fnmatch(module, pattern) for pattern in exclude)
+        ),
+        key=lambda item: (-item[1], item[0]),
+    )
+    selected = {module for module, _ in ranked}
+    result = []
+    for module, cumulative in ranked:
+        parts = module.split(".")
+        if any(".".join(parts[:i]) in selected for i in range(1, len(parts))):
+            continue
+        result.append((module, cumulative))
+    return result[:top]
+
+
+def format_ms(us: int) -> str:
+    return f"{us / 1000:.1f} ms"
+
+
+def format_config(option: str, modules: Sequence[tuple[str, int]], message: str) -> str:
+    lines = [f"{option} ="]
+    for module, cumulative in modules:
+        lines.append(f"  {module}.* = {message.format(ms=format_ms(cumulative))}")
+    return "\n".join(lines)
+
+
+def make_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m flake8_tidy_imports.importtime",
+        description=(
+            "Suggest bans for slow imports, from the output of python -X importtime."
+        ),
+    )
+    parser.add_argument(
+        "profiles",
+        nargs="*",
+        default=["-"],
+        help="Files of -X importtime output, or - for stdin. Defaults to stdin.",
+    )
+    parser.add_argument(
+        "--option",
+        choices=OPTIONS,
+        default=OPTIONS[0],
+        help="The option to write bans for. Defaults to %(default)s.",
+    )
+    parser.add_argument(
+        "--min-ms",
+        type=float,
+        default=10.0,
+        help=(
+            "Only ban modules with a cumulative import time of at least this "
+            + "many milliseconds. Defaults to %(default)s."
+        ),
+    )
+    parser.add_argument(
+        "--top",
+        type=int,
+        help="Only ban this many of the slowest modules.",
+    )
+    parser.add_argument(
+        "--exclude",
+        action="append",
+        default=[],
+        metavar="PATTERN",
+        help=(
+            "Skip modules matching this wildcard pattern, such as the entry "
+            + "point itself. Can be repeated."
+        ),
+    )
+    parser.add_argument(
+        "--message",
+        help=(
+            "Message for each ban, where {ms} is replaced with the import time. "
+            + "The default depends on --option."
+        ),
+    )
+    return parser
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = make_parser()
+    options = parser.parse_args(argv)
+    message = options.message or DEFAULT_MESSAGES[options.option]
+
+    lines: list[str] = []
+    for profile in options.profiles:
+        if profile == "-":
+            lines.extend(sys.stdin)
+        else:
+            with open(profile) as f:
+                lines.extend(f)
+    times = parse_importtime(lines)
+    if not times:
+        parser.error("no -X importtime output found")
+
+    modules = slow_modules(
+        times,
+        min_us=round(options.min_ms * 1000),
+        exclude=options.exclude,
+        top=options.top,
+    )
+    if not modules:
+        print(
+            f"No modules take at least {options.min_ms} ms to import.",
+            file=sys.stderr,
+        )
+        return 1
+    print(format_config(options.option, modules, message))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
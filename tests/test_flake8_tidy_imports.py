@@ -1,13 +1,17 @@
 from __future__ import annotations
 
+import pickle
+import random
 import re
+import subprocess
+import sys
 from importlib.metadata import version
 from textwrap import dedent
 from unittest.mock import Mock
 
 import pytest
 
-from src.flake8_tidy_imports import ImportChecker
+from src.flake8_tidy_imports import Config, Error, ImportChecker
 
 default_setup_cfg = """\
 [flake8]
@@ -28,6 +32,170 @@ def test_version(flake8_path):
     assert re.search(version_regex, unwrapped)
 
 
+@pytest.mark.parametrize(
+    "banned_modules, ban_relative_imports, banned_module_level_imports, expected",
+    (
+        ("", "", "", ["rule_I250"]),
+        ("mock = use unittest.mock", "", "", ["rule_I250", "rule_I251"]),
+        ("foo.* = no", "", "", ["rule_I250", "rule_I251"]),
+        ("*.foo = no", "", "", ["rule_I250", "rule_I251"]),
+        ("", "parents", "", ["rule_I250", "rule_I252"]),
+        ("mock = no", "true", "", ["rule_I250", "rule_I251", "rule_I252"]),
+        ("", "", "pandas = lazy", ["rule_I250", "rule_I253"]),
+    ),
+)
+def test_rules_enabled_by_options(
+    banned_modules, ban_relative_imports, banned_module_level_imports, expected
+):
+    options = Mock()
+    options.banned_modules = banned_modules
+    options.ban_relative_imports = ban_relative_imports
+    options.banned_module_level_imports = banned_module_level_imports
+    options.tidy_imports_stats = False
+
+    ImportChecker.parse_options(options)
+    assert [rule.__name__ for rule in ImportChecker.config.rules] == expected
+
+
+def test_nested_imports(flake8_path):
+    (flake8_path / "example.py").write_text(
+        dedent(
+            """\
+            def f():
+                from . import a
+            class C:
+                from . import b
+            if True:
+                from . import c
+            else:
+                from . import d
+            try:
+                from . import e
+            except ImportError:
+                from . import f
+            finally:
+                from . import g
+            with open(__file__):
+                from . import h
+            for x in []:
+                from . import i
+            while False:
+                from . import j
+            match 1:
+                case 1:
+                    async def k():
+                        from . import k
+            """
+        )
+    )
+    result = flake8_path.run_flake8(["--ban-relative-imports"])
+    assert result.out_lines == [
+        f"./example.py:{line}:{col}: I252 Relative imports are banned."
+        for line, col in (
+            (2, 5),
+            (4, 5),
+            (6, 5),
+            (8, 5),
+            (10, 5),
+            (12, 5),
+            (14, 5),
+            (16, 5),
+            (18, 5),
+            (20, 5),
+            (24, 13),
+        )
+    ]
+
+
+def test_version_not_read_on_import():
+    # Reading the package metadata is slow, so it should wait until the
+    # version is needed.
+    code = dedent(
+        """\
+        from importlib.metadata import Distribution
+
+        from_name = Distribution.from_name
+
+        def fail(name):
+            raise AssertionError(f"Metadata read for {name}")
+
+        Distribution.from_name = fail
+        import flake8_tidy_imports
+        Distribution.from_name = from_name
+
+        print(flake8_tidy_imports.ImportChecker.version)
+        """
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert result.stdout == version("flake8-tidy-imports") + "\n"
+
+
+@pytest.mark.parametrize("jobs", ["1", "2"])
+def test_stats(flake8_path, jobs):
+    (flake8_path / "example.py").write_text(
+        dedent(
+            """\
+            import mock
+            import foo.bar
+            from foo.bar import baz
+            """
+        )
+    )
+    (flake8_path / "example2.py").write_text(
+        dedent(
+            """\
+            def f():
+                import os
+            """
+        )
+    )
+    (flake8_path / "setup.cfg").write_text(
+        default_setup_cfg
+        + dedent(
+            """\
+            banned-modules = mock = use unittest.mock
+                             foo.* = no foo
+                             bar = no bar
+            tidy-imports-stats = true
+            """
+        )
+    )
+    result = flake8_path.run_flake8(["--jobs", jobs])
+    assert len(result.out_lines) == 3
+    assert result.err_lines[:9] == [
+        "flake8-tidy-imports stats:",
+        "  files checked: 2",
+        "  nodes visited: 7",
+        "  imports checked: 4",
+        "  ban lookups: 4",
+        "  ban lookup cache hits: 1",
+        "  exact ban matches: 1",
+        "  structured ban matches: 2",
+        "  unstructured ban matches: 0",
+    ]
+    assert [line.split(":")[0] for line in result.err_lines[9:12]] == [
+        "  rule_I250 time",
+        "  rule_I251 time",
+        "  traversal time",
+    ]
+    assert result.err_lines[12:] == [
+        "  matches per ban:",
+        "    2: foo.* = no foo",
+        "    1: mock = use unittest.mock",
+        "  bans never matched (1 of 3):",
+        "    bar = no bar",
+    ]
+
+
+def test_stats_off(flake8_path):
+    (flake8_path / "example.py").write_text("import mock\n")
+    result = flake8_path.run_flake8(["--banned-modules", "mock = no"])
+    assert len(result.out_lines) == 1
+    assert result.err_lines == []
+
+
 # I250
 
 
@@ -259,6 +427,31 @@ def test_I251_most_specific_imports(flake8_path):
     ]
 
 
+def test_I251_import_sharing_name_prefix(flake8_path):
+    (flake8_path / "example.py").write_text(
+        dedent(
+            """\
+            import mock, mockito
+            from foo import bar, barbaz
+
+            [mock, mockito, bar, barbaz]
+            """
+        )
+    )
+    result = flake8_path.run_flake8(
+        extra_args=[
+            "--banned-modules",
+            "mock = a\nmockito = b\nfoo.bar = c\nfoo.barbaz = d",
+        ]
+    )
+    assert set(result.out_lines) == {
+        "./example.py:1:1: I251 Banned import 'mock' used - a.",
+        "./example.py:1:1: I251 Banned import 'mockito' used - b.",
+        "./example.py:2:1: I251 Banned import 'foo.bar' used - c.",
+        "./example.py:2:1: I251 Banned import 'foo.barbaz' used - d.",
+    }
+
+
 def test_I251_relative_import(flake8_path):
     (flake8_path / "example.py").write_text(
         dedent(
@@ -575,6 +768,15 @@ def test_I251_wildcard_precedence(flake8_path, module, expected_message):
         ("*.foo", "foo", False),
         ("*.foo", "bar.foo", True),
         ("*.foo", "bar.bazfoo", False),
+        ("*.foo", "bar.baz.foo", True),
+        ("*.foo.*", "foo", False),
+        ("*.foo.*", "bar.foo", True),
+        ("*.foo.*", "bar.foo.baz", True),
+        ("foo.*.*", "foo", True),
+        ("foo.*.*", "foo.bar.baz", True),
+        ("foo.*.*", "foobar", False),
+        ("foo*.bar", "foo*.bar", True),
+        ("foo*.bar", "foox.bar", False),
     ),
 )
 def test_I251_is_module_banned(banned_module, imported_module, expected):
@@ -586,6 +788,8 @@ def test_I251_is_module_banned(banned_module, imported_module, expected):
     options = Mock()
     options.banned_modules = banned_modules_str
     options.ban_relative_imports = False
+    options.banned_module_level_imports = ""
+    options.tidy_imports_stats = False
 
     # Make sure we get the expected result on the module we're trying to import
     checker.parse_options(options)
@@ -593,6 +797,88 @@ def test_I251_is_module_banned(banned_module, imported_module, expected):
     assert is_banned is expected
 
 
+@pytest.mark.parametrize(
+    "banned_modules, imported_module, expected_message",
+    (
+        ("foo.* = structured\nfoo = concrete", "foo", "concrete"),
+        ("foo = concrete\nfoo.* = structured", "foo", "concrete"),
+        ("foo.* = first\nfoo.* = second", "foo.bar", "first"),
+        ("foo.* = general\nfoo.bar.* = specific", "foo.bar.baz", "specific"),
+        ("foo.bar.* = specific\nfoo.* = general", "foo.bar.baz", "specific"),
+        ("foo.bar.* = specific\nfoo.* = general", "foo.baz.bar", "general"),
+        ("foo.bar = concrete\nfoo.* = general", "foo.bar", "concrete"),
+        ("foo.bar = concrete\nfoo.* = general", "foo.bar.baz", "general"),
+    ),
+)
+def test_I251_is_module_banned_message(
+    banned_modules, imported_module, expected_message
+):
+    checker = ImportChecker(Mock())
+    options = Mock()
+    options.banned_modules = banned_modules
+    options.ban_relative_imports = False
+    options.banned_module_level_imports = ""
+    options.tidy_imports_stats = False
+
+    checker.parse_options(options)
+    assert checker._is_module_banned(imported_module) == (True, expected_message)
+
+
+def test_I251_is_module_banned_cached():
+    options = Mock()
+    options.banned_modules = "mock = use unittest.mock"
+    options.ban_relative_imports = False
+    options.banned_module_level_imports = ""
+    options.tidy_imports_stats = False
+    ImportChecker.parse_options(options)
+
+    assert ImportChecker(Mock())._is_module_banned("mock") == (
+        True,
+        "use unittest.mock",
+    )
+    assert ImportChecker(Mock())._is_module_banned("mock") == (
+        True,
+        "use unittest.mock",
+    )
+    assert ImportChecker.config.banned_modules.lookup.cache_info().hits == 1
+
+    # Re-parsing options drops the cache.
+    options.banned_modules = "mock = no"
+    ImportChecker.parse_options(options)
+
+    assert ImportChecker(Mock())._is_module_banned("mock") == (True, "no")
+    assert ImportChecker.config.banned_modules.lookup.cache_info().hits == 0
+
+
+@pytest.mark.parametrize("module", ["foo", "foo.bar", "foo.baz", "quux", ""])
+def test_I251_banned_children(module):
+    checker = ImportChecker(Mock())
+    options = Mock()
+    options.banned_modules = dedent(
+        """\
+        foo.bar = concrete
+        foo.* = structured general
+        foo.bar.* = structured specific
+        *.baz = unstructured first
+        foo.*.baz.* = unstructured second
+        """
+    )
+    options.ban_relative_imports = False
+    options.banned_module_level_imports = ""
+    options.tidy_imports_stats = False
+    checker.parse_options(options)
+    names = ["bar", "baz", "quux"]
+
+    result = list(checker.config.banned_modules.children(module, names))
+
+    expected = []
+    for name in names:
+        ban = checker._module_ban(f"{module}.{name}")
+        if ban is not None:
+            expected.append((f"{module}.{name}", ban))
+    assert result == expected
+
+
 def test_I251_python2to3_import_md5(flake8_path):
     (flake8_path / "example.py").write_text(
         dedent(
@@ -610,6 +896,21 @@ def test_I251_python2to3_import_md5(flake8_path):
     ]
 
 
+def test_I251_python2to3_not_loaded_on_import():
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys, flake8_tidy_imports\n"
+            + "print('flake8_tidy_imports._python2to3' in sys.modules)",
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert result.stdout == "False\n"
+
+
 # I252
 
 
@@ -778,3 +1079,310 @@ def test_I252_relative_import_parents_commandline(flake8_path):
     assert result.out_lines == [
         "./example.py:1:1: I252 Relative imports from parent modules are banned."
     ]
+
+
+# I253
+
+
+def test_I253_not_activated(flake8_path):
+    (flake8_path / "example.py").write_text("import pandas\n")
+    result = flake8_path.run_flake8()
+    assert result.out_lines == []
+
+
+def test_I253_module_level(flake8_path):
+    (flake8_path / "example.py").write_text(
+        dedent(
+            """\
+            import pandas
+            from torch import nn
+            import os
+
+            class C:
+                import boto3
+
+            try:
+                from pandas import io
+            except ImportError:
+                pass
+
+            if sys.version_info >= (3, 12):
+                import torch.cuda
+            """
+        )
+    )
+    (flake8_path / "setup.cfg").write_text(
+        default_setup_cfg
+        + dedent(
+            """\
+            banned-module-level-imports = pandas = import pandas lazily
+                                          torch.* = import torch lazily
+                                          *.boto3 = unused
+                                          boto3 = import boto3 lazily
+            """
+        )
+    )
+    result = flake8_path.run_flake8()
+    assert result.out_lines == [
+        "./example.py:1:1: I253 Banned module level import 'pandas' used - import pandas lazily.",
+        "./example.py:2:1: I253 Banned module level import 'torch.nn' used - import torch lazily.",
+        "./example.py:6:5: I253 Banned module level import 'boto3' used - import boto3 lazily.",
+        "./example.py:9:5: I253 Banned module level import 'pandas' used - import pandas lazily.",
+        "./example.py:14:5: I253 Banned module level import 'torch.cuda' used - import torch lazily.",
+    ]
+
+
+def test_I253_not_module_level(flake8_path):
+    (flake8_path / "example.py").write_text(
+        dedent(
+            """\
+            from typing import TYPE_CHECKING
+            import typing
+
+            if TYPE_CHECKING:
+                import pandas
+            if typing.TYPE_CHECKING:
+                from pandas import DataFrame
+            else:
+                import pandas.io
+
+            def f():
+                import pandas
+
+            class C:
+                async def g(self):
+                    if True:
+                        from pandas import DataFrame
+            """
+        )
+    )
+    (flake8_path / "setup.cfg").write_text(
+        default_setup_cfg + "banned-module-level-imports = pandas.* = import lazily"
+    )
+    result = flake8_path.run_flake8()
+    assert result.out_lines == [
+        "./example.py:9:5: I253 Banned module level import 'pandas.io' used - import lazily.",
+    ]
+
+
+def test_I253_with_I251(flake8_path):
+    (flake8_path / "example.py").write_text(
+        dedent(
+            """\
+            import mock
+            def f():
+                import mock
+            """
+        )
+    )
+    (flake8_path / "setup.cfg").write_text(
+        default_setup_cfg
+        + dedent(
+            """\
+            banned-modules = mock = use unittest.mock
+            banned-module-level-imports = mock = import lazily
+            """
+        )
+    )
+    result = flake8_path.run_flake8()
+    assert result.out_lines == [
+        "./example.py:1:1: I251 Banned import 'mock' used - use unittest.mock.",
+        "./example.py:1:1: I253 Banned module level import 'mock' used - import lazily.",
+        "./example.py:3:5: I251 Banned import 'mock' used - use unittest.mock.",
+    ]
+
+
+def test_config_banned_module_level_imports():
+    config = Config(banned_module_level_imports={"pandas": "import lazily"})
+
+    errors = config.check_source("import pandas\ndef f():\n    import pandas\n")
+
+    assert errors == [
+        Error(1, 0, "I253 Banned module level import 'pandas' used - import lazily.")
+    ]
+
+
+def test_config_banned_module_level_imports_fast_scan():
+    config = Config(banned_module_level_imports={"pandas": "import lazily"})
+    source = dedent(
+        """\
+        from typing import TYPE_CHECKING
+
+        if TYPE_CHECKING:
+            import pandas
+
+        def f():
+            import pandas
+        """
+    )
+
+    errors = config.check_source(source + "x = 1\n" * 200, fast_scan=True)
+
+    assert errors == []
+
+
+# Config
+
+
+def test_config_check_source():
+    config = Config(
+        "mock = use unittest.mock\nfoo.* = no foo", ban_relative_imports="parents"
+    )
+
+    errors = config.check_source(
+        dedent(
+            """\
+            from .. import a
+            import mock
+            def f():
+                from foo import bar
+            """
+        )
+    )
+
+    assert errors == [
+        Error(1, 0, "I252 Relative imports from parent modules are banned."),
+        Error(2, 0, "I251 Banned import 'mock' used - use unittest.mock."),
+        Error(4, 4, "I251 Banned import 'foo.bar' used - no foo."),
+    ]
+
+
+def test_config_check_source_fast_scan():
+    config = Config({"mock": "use unittest.mock"})
+    source = "import mock\n" + "x = 1\n" * 100 + "if x: import mock\n"
+
+    errors = config.check_source(source, fast_scan=True)
+
+    assert errors == config.check_source(source)
+    assert [error.line for error in errors] == [1, 102]
+
+
+def test_config_check_source_syntax_error():
+    with pytest.raises(SyntaxError):
+        Config().check_source("import\n")
+
+
+def test_config_check_tree():
+    tree = compile("import os.path as path\n", "<string>", "exec", 1024)
+
+    assert Config().check_tree(tree) == [
+        Error(1, 0, "I250 Unnecessary import alias - rewrite as 'from os import path'.")
+    ]
+
+
+def test_config_check_many():
+    config = Config({"foo.*": "no foo"}, ban_relative_imports=True)
+
+    results = config.check_many(["import os\n", "import foo.bar\nfrom . import x\n"])
+
+    assert list(results) == [
+        [],
+        [
+            Error(1, 0, "I251 Banned import 'foo.bar' used - no foo."),
+            Error(2, 0, "I252 Relative imports are banned."),
+        ],
+    ]
+
+
+@pytest.fixture
+def frequent_thread_switches():
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(interval)
+
+
+@pytest.mark.usefixtures("frequent_thread_switches")
+@pytest.mark.parametrize("fast_scan", [False, True])
+def test_config_check_many_threads(fast_scan):
+    rng = random.Random(0)
+    words = ["mock", "foo", "bar", "baz", "internal", "api"]
+
+    def module() -> str:
+        return ".".join(rng.choice(words) for _ in range(rng.randint(1, 4)))
+
+    sources = []
+    for _ in range(300):
+        lines = []
+        for _ in range(rng.randint(0, 30)):
+            kind = rng.randrange(4)
+            if kind == 0:
+                lines.append(f"import {module()}, {module()}")
+            elif kind == 1:
+                lines.append(f"import {module()} as {rng.choice(words)}")
+            elif kind == 2:
+                lines.append(f"from {module()} import {rng.choice(words)}, mock")
+            else:
+                lines.append(f"def f():\n    from .{module()} import api as api")
+        sources.append("\n".join(lines) + "\n" + "x = 1\n" * rng.randint(0, 100))
+    options = {
+        "mock": "no mock",
+        "foo.*": "no foo",
+        "*.internal": "no internal",
+        "bar.*.api": "no api",
+    }
+    serial = list(Config(options, "parents").check_many(sources, fast_scan))
+
+    # A fresh config, so threads also race to fill its lookup cache.
+    threaded = Config(options, "parents").check_many(sources, fast_scan, threads=8)
+
+    assert list(threaded) == serial
+    assert sum(len(errors) for errors in serial) > 1000
+
+
+def test_config_side_by_side():
+    banned = Config({"mock": "no mock"})
+    allowed = Config(ban_relative_imports=False)
+
+    assert banned.check_source("import mock\n") == [
+        Error(1, 0, "I251 Banned import 'mock' used - no mock.")
+    ]
+    assert allowed.check_source("import mock\nfrom . import x\n") == []
+    assert banned.check_source("import mock\n") == [
+        Error(1, 0, "I251 Banned import 'mock' used - no mock.")
+    ]
+
+
+def test_config_not_shared_with_plugin():
+    options = Mock()
+    options.banned_modules = "os = no os"
+    options.ban_relative_imports = ""
+    options.banned_module_level_imports = ""
+    options.tidy_imports_stats = False
+    ImportChecker.parse_options(options)
+
+    assert Config().check_source("import os\n") == []
+    assert ImportChecker.config.check_source("import os\n") == [
+        Error(1, 0, "I251 Banned import 'os' used - no os.")
+    ]
+
+
+def test_config_pickle():
+    config = Config({"mock": "no mock", "foo.*": "no foo", "*.bar": "no bar"}, True)
+    source = "import mock\nfrom foo import baz\nimport baz.bar\nfrom . import x\n"
+    errors = config.check_source(source)
+
+    loaded = pickle.loads(pickle.dumps(config))
+
+    assert loaded.banned_modules.lines == config.banned_modules.lines
+    assert loaded.rules == config.rules
+    assert loaded.banned_modules.lookup.cache_info().currsize == 0
+    assert loaded.check_source(source) == errors
+    assert len(errors) == 4
+
+
+def test_config_immutable():
+    config = Config()
+
+    with pytest.raises(AttributeError, match="Config objects are immutable"):
+        config.ban_relative_imports = "true"
+
+
+def test_config_invalid_ban_relative_imports():
+    with pytest.raises(ValueError, match="Invalid ban_relative_imports value 'yes'"):
+        Config(ban_relative_imports="yes")
+
+
+def test_config_missing_equals():
+    with pytest.raises(ValueError, match="'=' not found"):
+        Config("mock")
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import subprocess
+import sys
+from io import StringIO
+from textwrap import dedent
+
+import pytest
+
+from src.flake8_tidy_imports import Config
+from src.flake8_tidy_imports.importtime import main
+
+PROFILE = dedent(
+    """\
+    import time: self [us] | cumulative | imported package
+    import time:       306 |        306 |   _io
+    import time:      2000 |       2000 |     numpy.core
+    import time:      9000 |      11000 |   numpy
+    import time:      5000 |       5000 |       pandas.core.frame
+    import time:      7000 |      12000 |     pandas.core
+    import time:     30000 |      53000 |   pandas
+    import time:       100 |      53400 | myapp
+    import time:    cached |     cached |   numpy
+    """
+)
+
+
+@pytest.fixture
+def profile(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "importtime.txt").write_text(PROFILE)
+
+
+def test_main(profile, capsys):
+    assert main(["importtime.txt", "--exclude", "myapp"]) == 0
+
+    assert capsys.readouterr().out.splitlines() == [
+        "banned-module-level-imports =",
+        "  pandas.* = import it inside functions, it takes 53.0 ms to import",
+        "  numpy.* = import it inside functions, it takes 11.0 ms to import",
+    ]
+
+
+def test_main_config_usable(profile, capsys):
+    main(["importtime.txt", "--exclude", "myapp"])
+    bans = capsys.readouterr().out.split("=", 1)[1]
+
+    errors = Config(banned_module_level_imports=bans).check_source(
+        "from pandas.core import frame\n"
+    )
+
+    assert [error.message for error in errors] == [
+        "I253 Banned module level import 'pandas.core.frame' used - "
+        + "import it inside functions, it takes 53.0 ms to import.",
+    ]
+
+
+def test_main_options(profile, capsys):
+    args = ["importtime.txt", "--option", "banned-modules", "--min-ms", "0.3"]
+    args += ["--top", "3", "--message", "slow ({ms})"]
+
+    assert main(args) == 0
+
+    assert capsys.readouterr().out.splitlines() == [
+        "banned-modules =",
+        "  myapp.* = slow (53.4 ms)",
+        "  pandas.* = slow (53.0 ms)",
+        "  numpy.* = slow (11.0 ms)",
+    ]
+
+
+def test_main_several_profiles(profile, tmp_path, capsys, monkeypatch):
+    (tmp_path / "other.txt").write_text("import time: 1 | 70000 | numpy\n")
+    monkeypatch.setattr(sys, "stdin", StringIO(PROFILE))
+
+    assert main(["-", "other.txt", "--exclude", "my*", "--top", "1"]) == 0
+
+    assert capsys.readouterr().out.splitlines() == [
+        "banned-module-level-imports =",
+        "  numpy.* = import it inside functions, it takes 70.0 ms to import",
+    ]
+
+
+def test_main_none_slow(profile, capsys):
+    assert main(["importtime.txt", "--min-ms", "100"]) == 1
+
+    out, err = capsys.readouterr()
+    assert out == ""
+    assert err == "No modules take at least 100.0 ms to import.\n"
+
+
+def test_main_no_profile(tmp_path, capsys):
+    (tmp_path / "empty.txt").write_text("Traceback...\n")
+
+    with pytest.raises(SystemExit):
+        main([str(tmp_path / "empty.txt")])
+
+    assert "no -X importtime output found" in capsys.readouterr().err
+
+
+def test_main_module():
+    profile = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import json"],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stderr
+
+    result = subprocess.run(
+        [sys.executable, "-m", "flake8_tidy_imports.importtime", "--min-ms", "0"],
+        input=profile,
+        capture_output=True,
+        text=True,
+    )
+
+    assert result.returncode == 0
+    assert any(line.startswith("  json.* = ") for line in result.stdout.splitlines())
@@ -0,0 +1,271 @@
+from __future__ import annotations
+
+import subprocess
+import sys
+from io import StringIO
+from textwrap import dedent
+
+import pytest
+
+from src.flake8_tidy_imports.__main__ import main
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "setup.cfg").write_text(
+        dedent(
+            """\
+            [flake8]
+            banned-modules = mock = use unittest.mock
+                             foo.* = no foo
+            """
+        )
+    )
+    return tmp_path
+
+
+def test_main(project, capsys):
+    (project / "example.py").write_text("import mock\nimport os.path as path\n")
+    (project / "ok.py").write_text("import os\n")
+
+    assert main([]) == 1
+
+    assert capsys.readouterr().out.splitlines() == [
+        "./example.py:1:1: I251 Banned import 'mock' used - use unittest.mock.",
+        "./example.py:2:1: I250 Unnecessary import alias - rewrite as 'from os import path'.",
+    ]
+
+
+def test_main_pass(project, capsys):
+    (project / "ok.py").write_text("import os\n")
+
+    assert main([]) == 0
+
+    assert capsys.readouterr().out == ""
+
+
+def test_main_jobs(project, capsys):
+    for i in range(20):
+        (project / f"example{i}.py").write_text("import mock\nfrom foo import bar\n")
+    assert main(["--jobs", "1"]) == 1
+    serial = capsys.readouterr().out
+
+    assert main(["--jobs", "4"]) == 1
+
+    assert capsys.readouterr().out == serial
+    assert len(serial.splitlines()) == 40
+
+
+def test_main_threads(project, capsys):
+    for i in range(20):
+        (project / f"example{i}.py").write_text("import mock\nfrom foo import bar\n")
+    assert main(["--jobs", "1"]) == 1
+    serial = capsys.readouterr().out
+
+    assert main(["--jobs", "4", "--threads"]) == 1
+
+    assert capsys.readouterr().out == serial
+
+
+def test_main_threads_stats(project, capsys):
+    with pytest.raises(SystemExit):
+        main(["--threads", "--tidy-imports-stats"])
+
+    assert "--threads cannot be used with --tidy-imports-stats" in (
+        capsys.readouterr().err
+    )
+
+
+def test_main_module(project):
+    (project / "example.py").write_text("import mock\n")
+
+    result = subprocess.run(
+        [sys.executable, "-m", "flake8_tidy_imports", "example.py"],
+        capture_output=True,
+        text=True,
+    )
+
+    assert result.returncode == 1
+    assert result.stdout == (
+        "example.py:1:1: I251 Banned import 'mock' used - use unittest.mock.\n"
+    )
+
+
+def test_main_options_override_config(project, capsys):
+    (project / "example.py").write_text("import mock\nfrom . import foo\n")
+
+    assert main(["--banned-modules", "", "--ban-relative-imports"]) == 1
+
+    assert capsys.readouterr().out.splitlines() == [
+        "./example.py:2:1: I252 Relative imports are banned.",
+    ]
+
+
+def test_main_config_option(project, capsys):
+    (project / "other.ini").write_text(
+        "[flake8]\nban_relative_imports = parents\ntidy-imports-stats = false\n"
+    )
+    (project / "example.py").write_text("import mock\nfrom .. import foo\n")
+
+    assert main(["--config", "other.ini"]) == 1
+
+    assert capsys.readouterr().out.splitlines() == [
+        "./example.py:2:1: I252 Relative imports from parent modules are banned.",
+    ]
+
+
+def test_main_config_invalid(project, capsys):
+    (project / "setup.cfg").write_text("[flake8]\nban-relative-imports = always\n")
+
+    with pytest.raises(SystemExit):
+        main([])
+
+    assert "invalid value for ban-relative-imports" in capsys.readouterr().err
+
+
+def test_main_file_list(project, capsys, monkeypatch):
+    (project / "a.py").write_text("import mock\n")
+    (project / "b.py").write_text("import mock\n")
+    monkeypatch.setattr(sys, "stdin", StringIO("b.py\n\n"))
+
+    assert main(["--file-list", "-"]) == 1
+
+    assert capsys.readouterr().out.splitlines() == [
+        "b.py:1:1: I251 Banned import 'mock' used - use unittest.mock.",
+    ]
+
+
+def test_main_exclude(project, capsys):
+    (project / "build").mkdir()
+    (project / "build" / "example.py").write_text("import mock\n")
+    (project / ".git").mkdir()
+    (project / ".git" / "example.py").write_text("import mock\n")
+    (project / "example.txt").write_text("import mock\n")
+    with (project / "setup.cfg").open("a") as f:
+        f.write("extend-exclude = ./build\n")
+
+    assert main([]) == 0
+
+    assert capsys.readouterr().out == ""
+
+
+def test_main_noqa(project, capsys):
+    (project / "example.py").write_text(
+        dedent(
+            """\
+            import mock  # noqa
+            import mock  # noqa: I251
+            import mock  # NOQA:E501
+            x = '''
+            '''; import mock  # noqa
+            from foo import (
+                bar,  # noqa
+            )
+            """
+        )
+    )
+    (project / "skipped.py").write_text("# flake8: noqa\nimport mock\n")
+
+    assert main([]) == 1
+
+    assert capsys.readouterr().out.splitlines() == [
+        "./example.py:3:1: I251 Banned import 'mock' used - use unittest.mock.",
+        "./example.py:6:1: I251 Banned import 'foo.bar' used - no foo.",
+    ]
+
+
+@pytest.mark.parametrize(
+    "args,codes",
+    [
+        ([], ["I251", "I250"]),
+        (["--select", "I250"], ["I250"]),
+        (["--extend-ignore", "I25"], []),
+        (["--select", "I250", "--ignore", "I25"], ["I250"]),
+        (["--select", "I25", "--ignore", "I250"], ["I251"]),
+    ],
+)
+def test_main_select_ignore(project, capsys, args, codes):
+    (project / "example.py").write_text("import mock\nimport os.path as path\n")
+
+    main(args)
+
+    out = capsys.readouterr().out
+    assert [line.split(" ")[1] for line in out.splitlines()] == codes
+
+
+def test_main_syntax_error(project, capsys):
+    (project / "example.py").write_text("def f(:\n")
+
+    assert main([]) == 1
+
+    assert capsys.readouterr().out == (
+        "./example.py:1:8: E999 SyntaxError: invalid syntax\n"
+    )
+
+
+def test_main_unreadable(project, capsys):
+    (project / "example.py").write_text("import mock\n")
+
+    assert main(["missing.py", "example.py"]) == 1
+
+    assert capsys.readouterr().out.splitlines() == [
+        "example.py:1:1: I251 Banned import 'mock' used - use unittest.mock.",
+        "missing.py:0:1: E902 FileNotFoundError: [Errno 2] No such file or "
+        + "directory: 'missing.py'",
+    ]
+
+
+def test_main_unreadable_jobs(project, capsys):
+    for i in range(4):
+        (project / f"example{i}.py").write_text("import mock\n")
+
+    assert main(["--jobs", "2", "missing.py", "."]) == 1
+
+    out = capsys.readouterr().out.splitlines()
+    assert len(out) == 5
+    assert out[-1].startswith("missing.py:0:1: E902 FileNotFoundError: ")
+
+
+def test_main_bad_encoding(project, capsys):
+    (project / "cookie.py").write_bytes(b"# -*- coding: bogus -*-\nimport mock\n")
+    (project / "utf8.py").write_bytes(b"# coding: utf-8\nx = '\xff'\n")
+
+    assert main([]) == 1
+
+    assert capsys.readouterr().out.splitlines() == [
+        "./cookie.py:1:1: E999 SyntaxError: unknown encoding: bogus",
+        "./utf8.py:1:1: E999 UnicodeDecodeError: 'utf-8' codec can't decode "
+        + "byte 0xff in position 21: invalid start byte",
+    ]
+
+
+def test_main_fast_scan(project, capsys):
+    (project / "example.py").write_text(
+        "import mock\n" + "x = 1\n" * 50 + "def f():\n    from foo import bar\n"
+    )
+    (project / "bad.py").write_text("import mock\ndef f(:\n" + "x = 1\n" * 50)
+
+    assert main(["--fast-scan"]) == 1
+
+    assert capsys.readouterr().out.splitlines() == [
+        "./bad.py:1:1: I251 Banned import 'mock' used - use unittest.mock.",
+        "./example.py:1:1: I251 Banned import 'mock' used - use unittest.mock.",
+        "./example.py:53:5: I251 Banned import 'foo.bar' used - no foo.",
+    ]
+
+
+def test_main_fast_scan_module_level_imports(project, capsys):
+    (project / "example.py").write_text(
+        "import mock\n" + "x = 1\n" * 50 + "def f():\n    import mock\n"
+    )
+    with (project / "setup.cfg").open("a") as f:
+        f.write("banned-module-level-imports = mock = import lazily\n")
+
+    assert main(["--fast-scan"]) == 1
+
+    assert capsys.readouterr().out.splitlines() == [
+        "./example.py:1:1: I251 Banned import 'mock' used - use unittest.mock.",
+        "./example.py:1:1: I253 Banned module level import 'mock' used - import lazily.",
+        "./example.py:53:5: I251 Banned import 'mock' used - use unittest.mock.",
+    ]
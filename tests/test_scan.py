@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import ast
+from textwrap import dedent
+from unittest import mock
+
+import pytest
+
+from src.flake8_tidy_imports import ImportChecker
+from src.flake8_tidy_imports._scan import scan_imports
+
+
+@pytest.fixture(autouse=True)
+def options():
+    options = mock.Mock()
+    options.banned_modules = dedent(
+        """\
+        mock = use unittest.mock
+        foo.* = no foo
+        *.bar = no bar
+        """
+    )
+    options.ban_relative_imports = "true"
+    options.banned_module_level_imports = ""
+    options.tidy_imports_stats = False
+    ImportChecker.parse_options(options)
+
+
+# Code that makes imports sparse enough to scan.
+padding = "x = 1\n" * 50
+
+
+def check(tree: ast.AST) -> list[tuple[int, int, str]]:
+    return sorted(result[:3] for result in ImportChecker(tree).run())
+
+
+@pytest.mark.parametrize(
+    "source",
+    [
+        "",
+        "x = 1\n",
+        "import mock\n",
+        "import os.path as path, mock\n",
+        "from foo import bar as bar, baz\n",
+        "from . import foo\nfrom ..foo import bar\n",
+        "from foo import (\n    bar,  # )\n    baz,\n)\n",
+        "def f():\n    import mock\n\n    class A:\n        from foo import a\n",
+        "if x: import mock\nelse: from foo import bar\n",
+        "x = 1; import mock; y = 2\n",
+        "import mock  # from foo import bar\n",
+        "x = '''\nimport mock\n'''\ny = 'from foo import bar'\n",
+        "x = 'a\\\nimport mock'\n",
+        "from \\\n    foo import bar\n",
+        "x = 'é'; import mock\n",
+        "import mock\r\nfrom foo import bar\r\n",
+        "def f():\n    yield from g()\n",
+        "try:\n    import a.bar\nexcept ImportError:\n    import b.bar as bar\n",
+        "important = from_ = 1\n",
+    ],
+)
+def test_same_as_ast(source):
+    source += padding
+    tree = scan_imports(source)
+
+    assert tree is not None
+    assert check(tree) == check(ast.parse(source))
+
+
+@pytest.mark.parametrize(
+    "source",
+    [
+        "from foo \\\n    import bar\n",
+        "import os\ndef f():\n    x = (yield\n         from g())\n",
+        "import os\nraise ValueError() \\\n    from None\n",
+        "import\n",
+    ],
+)
+def test_needs_full_parse(source):
+    assert scan_imports(source + padding) is None
+
+
+def test_mostly_imports():
+    assert scan_imports("import mock\nimport os\n") is None